@@ -1,7 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from typing import List
-import ollama
 from sqlalchemy.orm import Session
 from api.database import get_db  # adjust to your project structure
 from .models import ArticleSummary  # your SQLAlchemy model
@@ -10,6 +9,9 @@ from .database import get_db  # your database session dependency
 from .crud import generate_broadcast_content  # adjust to your project structure
 from datetime import datetime
 from modules.tts import generate_audio
+from modules import resource_versions
+from modules.singleflight import single_flight
+from .http_cache import cached_response
 router = APIRouter()
 
 class BroadcastResponse(BaseModel):
@@ -26,10 +28,13 @@ class AudioGenerationRequest(BaseModel):
     text: str
 
 @router.get("/summaries", response_model=ArticleSummariesResponse)
-def get_article_summaries(db: Session = Depends(get_db)):
-    summaries = db.query(ArticleSummary.summary).all()
-    # Extract the string summary from each tuple and return as a list
-    return {"summary": [s[0] for s in summaries]}
+def get_article_summaries(request: Request, db: Session = Depends(get_db)):
+    def build():
+        summaries = db.query(ArticleSummary.summary).all()
+        # Extract the string summary from each tuple and return as a list
+        return {"summary": [s[0] for s in summaries]}
+    # Only queried again after an ingest changed the summaries
+    return cached_response(request, [resource_versions.SUMMARIES], build)
 
 @router.get("/generate_broadcast", response_model=BroadcastResponse)
 def generate_broadcast(db: Session = Depends(get_db)):
@@ -52,21 +57,31 @@ Output only the text of the news broadcast with no symbols or text introducing o
     Here are the summaries to work with:
 
 {combined}"""
-    response = ollama.chat(
-        model='mistral-small:24b-instruct-2501-q8_0',
-        messages=[{"role": "user", "content": prompt}]
-    )
+    def chat():
+        import ollama  # imported on first use to keep API start-up fast
+
+        response = ollama.chat(
+            model='mistral-small:24b-instruct-2501-q8_0',
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response['message']['content']
 
-    news_broadcast = response['message']['content']
+    # Identical requests made while a broadcast is being written share it
+    news_broadcast, _ = single_flight("generate_broadcast", chat, prompt)
     return {"broadcast": news_broadcast}
 
 @router.post("/generate_audio", response_model=AudioResponse)
 def generate_audio_endpoint(request: AudioGenerationRequest):
-    try:
+    def synthesize():
         # Generate a unique filename based on timestamp
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         filename = f"broadcast_{timestamp}.mp3"
-        audio_path = generate_audio(request.text, filename)
+        generate_audio(request.text, filename)
+        return filename
+
+    try:
+        # Concurrent requests for the same text get the same file
+        filename, _ = single_flight("generate_audio", synthesize, request.text)
         # Return the URL relative to the static directory
         return {"audio_url": f"/static/audio/{filename}"}
     except Exception as e:
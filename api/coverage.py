@@ -0,0 +1,124 @@
+import math
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from api.database import get_db
+from api import crud
+from modules.digest_store import digest_date
+
+router = APIRouter()
+
+def _weighted_diversity(scored_count, diversity_sum):
+    return round(diversity_sum / scored_count, 3) if scored_count else None
+
+def _balance(counts):
+    """
+    Shannon entropy of a distribution, normalised to 0 (one value only) .. 1
+    (evenly spread), and the effective number of values (exp of the entropy)
+    """
+    total = sum(counts)
+    if not total:
+        return {"evenness": None, "effective_count": 0}
+    entropy = -sum(c / total * math.log(c / total) for c in counts if c)
+    evenness = entropy / math.log(len(counts)) if len(counts) > 1 else 0.0
+    return {"evenness": round(evenness, 3), "effective_count": round(math.exp(entropy), 3)}
+
+def _distribution(values):
+    total = sum(article_count for article_count, _, _ in values.values())
+    rows = [{
+        "value": value,
+        "articles": article_count,
+        "share": round(article_count / total, 3) if total else 0.0,
+        "weighted_diversity": _weighted_diversity(scored_count, diversity_sum),
+    } for value, (article_count, scored_count, diversity_sum) in values.items()]
+    rows.sort(key=lambda r: (-r["articles"], r["value"]))
+    return rows
+
+def _cluster_spread(cluster_id, members):
+    perspectives, regions = {}, {}
+    for perspective, region, article_count in members:
+        perspectives[perspective] = perspectives.get(perspective, 0) + article_count
+        regions[region] = regions.get(region, 0) + article_count
+    return {
+        "cluster_id": cluster_id,
+        "articles": sum(perspectives.values()),
+        "perspective_count": len(perspectives),
+        "region_count": len(regions),
+        "perspective_balance": _balance(list(perspectives.values())),
+        "perspectives": perspectives,
+        "regions": regions,
+    }
+
+@router.get("/coverage")
+def get_coverage(
+    date: Optional[str] = None,
+    run_id: Optional[str] = None,
+    clusters: int = Query(10, ge=0, le=200),
+    db: Session = Depends(get_db),
+):
+    """
+    Source diversity of the articles published on a day (UTC, default today)
+    or ingested in one pipeline run.
+
+    Served from the coverage aggregates updated at ingest, so the cost does
+    not depend on how many digests exist. For days, the story clusters with
+    the widest perspective spread are included.
+    """
+    if run_id:
+        scope, scope_key = "run", run_id
+    else:
+        try:
+            # Day buckets are keyed by UTC publication date, so "today" is the UTC day too
+            scope, scope_key = "day", digest_date(date or datetime.utcnow())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    counts = crud.coverage_counts(db, scope, scope_key)
+    if not counts:
+        raise HTTPException(status_code=404, detail=f"No coverage recorded for {scope} {scope_key}")
+
+    article_count, scored_count, diversity_sum = counts.get("total", {}).get("all", (0, 0, 0.0))
+    result = {
+        "scope": scope,
+        "key": scope_key,
+        "articles": article_count,
+        "weighted_diversity": _weighted_diversity(scored_count, diversity_sum),
+        "balance": {dimension: _balance([c for c, _, _ in counts.get(dimension, {}).values()])
+                    for dimension in ("region", "perspective")},
+    }
+    for dimension in crud.COVERAGE_DIMENSIONS:
+        result[f"{dimension}s"] = _distribution(counts.get(dimension, {}))
+
+    if scope == "day" and clusters:
+        spread = [_cluster_spread(cluster_id, members)
+                  for cluster_id, members in crud.cluster_coverage(db, day=scope_key).items()]
+        spread.sort(key=lambda c: (c["perspective_count"], c["articles"]), reverse=True)
+        result["clusters"] = spread[:clusters]
+    return result
+
+@router.get("/coverage/history")
+def get_coverage_history(
+    scope: str = "day",
+    limit: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db),
+):
+    """Article counts and weighted diversity of the most recent days or runs"""
+    if scope not in crud.COVERAGE_SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {', '.join(crud.COVERAGE_SCOPES)}")
+    return {
+        "scope": scope,
+        "history": [{
+            "key": scope_key,
+            "articles": article_count,
+            "weighted_diversity": _weighted_diversity(scored_count, diversity_sum),
+        } for scope_key, article_count, scored_count, diversity_sum in crud.coverage_totals(db, scope, limit)],
+    }
+
+@router.get("/coverage/clusters/{cluster_id}")
+def get_cluster_coverage(cluster_id: str, db: Session = Depends(get_db)):
+    """Perspective and region spread of one story cluster across all days"""
+    members = crud.cluster_coverage(db, cluster_id=cluster_id).get(cluster_id)
+    if not members:
+        raise HTTPException(status_code=404, detail="Story cluster not found")
+    return _cluster_spread(cluster_id, members)
@@ -1,6 +1,14 @@
-import ollama
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from .models import ArticleSummary
+from .models import (ArticleSummary, ClusterCoverageCount, CoverageCount, EntityMentionCount,
+                     IngestedArticle)
+
+# Granularities kept for entity mention counts
+GRANULARITIES = ("hour", "day", "week")
+COVERAGE_SCOPES = ("run", "day")
+COVERAGE_DIMENSIONS = ("region", "perspective", "source")
+UNKNOWN = "unknown"
 
 def create_article_summary(db: Session, summary: str):
     db_summary = ArticleSummary(summary=summary)
@@ -13,12 +21,151 @@ def get_article_summary_by_text(db: Session, summary_text: str):
     """Check if an article summary already exists by text content"""
     return db.query(ArticleSummary).filter(ArticleSummary.summary == summary_text).first()
 
+def replace_article_summary(db: Session, old_text: str, new_text: str):
+    """Replace a summary in place, or drop it if the new text is already stored"""
+    existing = get_article_summary_by_text(db, old_text)
+    if existing is None:
+        return None
+    if get_article_summary_by_text(db, new_text) is not None:
+        db.delete(existing)
+    else:
+        existing.summary = new_text
+    db.commit()
+    return existing
+
+def parse_timestamp(value):
+    """ISO timestamp (e.g. an RSS pub date) as naive UTC, or None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def bucket_start(when: datetime, granularity: str) -> datetime:
+    """Start of the hour/day/week (weeks start on Monday) containing `when`"""
+    if granularity == "hour":
+        return when.replace(minute=0, second=0, microsecond=0)
+    day = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+def is_article_ingested(db: Session, article_id: str) -> bool:
+    """Whether an article (or marker key) was already recorded as ingested"""
+    return db.get(IngestedArticle, article_id) is not None
+
+def mark_article_ingested(db: Session, article_id: str) -> bool:
+    """Record an article as ingested; False if it already was"""
+    if db.get(IngestedArticle, article_id) is not None:
+        return False
+    db.add(IngestedArticle(id=article_id, ingested_at=datetime.utcnow()))
+    return True
+
+def increment_entity_counts(db: Session, entities: dict, when: datetime):
+    """Add one mention per entity to its hour, day and week buckets (no commit)"""
+    for category, names in (entities or {}).items():
+        for name in names:
+            for granularity in GRANULARITIES:
+                start = bucket_start(when, granularity)
+                row = db.query(EntityMentionCount).filter_by(
+                    granularity=granularity, bucket_start=start, entity=name, category=category
+                ).first()
+                if row is None:
+                    row = EntityMentionCount(granularity=granularity, bucket_start=start,
+                                             entity=name, category=category, count=0)
+                    db.add(row)
+                    db.flush()
+                row.count += 1
+
+def entity_counts_between(db: Session, granularity: str, start: datetime, end: datetime, category: str = None):
+    """Summed mention counts per entity over buckets in [start, end)"""
+    query = db.query(
+        EntityMentionCount.entity,
+        EntityMentionCount.category,
+        func.sum(EntityMentionCount.count),
+    ).filter(
+        EntityMentionCount.granularity == granularity,
+        EntityMentionCount.bucket_start >= start,
+        EntityMentionCount.bucket_start < end,
+    )
+    if category:
+        query = query.filter(EntityMentionCount.category == category)
+    rows = query.group_by(EntityMentionCount.entity, EntityMentionCount.category).all()
+    return {(entity, cat): int(total) for entity, cat, total in rows}
+
+def _get_or_create(db: Session, model, **key):
+    row = db.query(model).filter_by(**key).first()
+    if row is None:
+        row = model(**key)
+        db.add(row)
+        db.flush()
+    return row
+
+def increment_coverage_counts(db: Session, scope_keys: dict, source: dict, cluster_id: str = None):
+    """
+    Count one ingested article from `source` (name, region, perspective,
+    diversity_score) into each {scope: key} and, for clustered articles,
+    into its story cluster's perspective spread for the day (no commit)
+    """
+    score = source.get("diversity_score")
+    values = {dimension: source.get(dimension) or UNKNOWN for dimension in COVERAGE_DIMENSIONS}
+    values["total"] = "all"
+    for scope, scope_key in scope_keys.items():
+        if not scope_key:
+            continue
+        for dimension, value in values.items():
+            row = _get_or_create(db, CoverageCount, scope=scope, scope_key=scope_key,
+                                 dimension=dimension, value=value)
+            row.article_count = (row.article_count or 0) + 1
+            if score is not None:
+                row.scored_count = (row.scored_count or 0) + 1
+                row.diversity_sum = (row.diversity_sum or 0.0) + float(score)
+
+    if cluster_id and scope_keys.get("day"):
+        row = _get_or_create(db, ClusterCoverageCount, cluster_id=cluster_id, day=scope_keys["day"],
+                             perspective=values["perspective"], region=values["region"])
+        row.article_count = (row.article_count or 0) + 1
+
+def coverage_counts(db: Session, scope: str, scope_key: str):
+    """{dimension: {value: (article_count, scored_count, diversity_sum)}} for one run or day"""
+    rows = db.query(CoverageCount).filter_by(scope=scope, scope_key=scope_key).all()
+    counts = {}
+    for row in rows:
+        counts.setdefault(row.dimension, {})[row.value] = (row.article_count, row.scored_count, row.diversity_sum)
+    return counts
+
+def coverage_totals(db: Session, scope: str, limit: int = 30):
+    """Most recent runs or days with their (article_count, scored_count, diversity_sum)"""
+    rows = db.query(CoverageCount).filter_by(scope=scope, dimension="total", value="all") \
+        .order_by(CoverageCount.scope_key.desc()).limit(limit).all()
+    return [(row.scope_key, row.article_count, row.scored_count, row.diversity_sum) for row in rows]
+
+def cluster_coverage(db: Session, day: str = None, cluster_id: str = None):
+    """{cluster_id: [(perspective, region, article_count), ...]} for a day and/or cluster"""
+    query = db.query(ClusterCoverageCount)
+    if day:
+        query = query.filter(ClusterCoverageCount.day == day)
+    if cluster_id:
+        query = query.filter(ClusterCoverageCount.cluster_id == cluster_id)
+    clusters = {}
+    for row in query.all():
+        clusters.setdefault(row.cluster_id, []).append((row.perspective, row.region, row.article_count))
+    return clusters
+
 def generate_broadcast_content(db: Session):
     # Fetch all summaries
     summaries = db.query(ArticleSummary.summary).all()
     combined = "\n\n".join(summary[0] for summary in summaries)
     # Call Ollama model
     prompt = f"Create an objective news broadcast in formal tone based on these summaries:\n\n{combined}"
+    import ollama
+
     response = ollama.chat(
         model='phi4-reasoning:latest',
         messages=[{"role": "user", "content": prompt}]
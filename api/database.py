@@ -1,8 +1,9 @@
+import os
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 
-DATABASE_URL = "sqlite:///./db.sqlite3"  # Or your DB
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./db.sqlite3")  # Or your DB
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,21 +1,25 @@
 # obj01/api/graph.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from nlp.entity_extractor import extract_entity_relationships, build_networkx_graph
-from fastapi.responses import JSONResponse
+from modules.source_health import SourceHealthTracker
+from modules.digest_store import digest_date, page_digest, read_digest
+from modules import resource_versions
+from api.http_cache import cached_response, file_signature
 from pydantic import BaseModel
 import os
 import json
 import yaml
-from datetime import datetime # Import datetime
+from typing import Optional
 
 current_dir = os.path.dirname(__file__)
-# Dynamically generate news digest filepath based on current date
-timestamp = datetime.now().strftime("%Y-%m-%d")
-news_digest_filepath = os.path.join(current_dir, '..', 'output', f'news_digest_{timestamp}.json')
+# The news digest for the current day is resolved per request by modules.digest_store
+news_digest_dir = os.path.join(current_dir, '..', 'output')
 feeds_config_filepath = os.path.join(current_dir, '..', 'configs', 'feeds.yaml')
 
-# news_digest_json is no longer needed as data is reloaded in get_articles
+# Full article bodies are kept in the digest for later re-processing but left
+# out of listings unless explicitly requested
+HEAVY_DIGEST_FIELDS = ("text", "translated_text")
 
 router = APIRouter()
 
@@ -28,6 +32,8 @@ class FeedSource(BaseModel):
     diversity_score: float
     perspective: str
     region: str
+    extractor: str = "newspaper"  # "newspaper" or "fast" (readability-lxml)
+    summarizer: Optional[str] = None  # "abstractive" or "extractive"; None uses the run default
 
 # Helper function to read feeds.yaml
 def read_feeds_config():
@@ -45,56 +51,104 @@ def write_feeds_config(config_data):
     try:
         with open(feeds_config_filepath, 'w') as f:
             yaml.dump(config_data, f, indent=2)
+        resource_versions.bump(resource_versions.FEEDS)
     except Exception as e:
         print(f"Error writing feeds.yaml: {e}")
         raise HTTPException(status_code=500, detail="Error writing feeds configuration")
 
-@router.get("/graph.json")
-def get_graph():
-    # Use the dynamically generated news digest filepath
+def resolve_digest_date(date):
+    """The digest date a request reads (today by default), or a 400"""
     try:
-        with open(news_digest_filepath, 'r') as f:
-            summaries = json.load(f)
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="News digest file not found")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Error decoding news digest JSON")
+        return digest_date(date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/graph.json")
+def get_graph(request: Request, date: Optional[str] = None):
+    date = resolve_digest_date(date)
+
+    def build():
+        # Served from the cached digest; only re-parsed when the file changes
+        try:
+            summaries = read_digest(date, output_dir=news_digest_dir)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=500, detail="Error decoding news digest JSON")
 
+        if not summaries:
+             raise HTTPException(status_code=404, detail="No summaries found in news digest")
 
-    if not summaries:
-         raise HTTPException(status_code=404, detail="No summaries found in news digest")
+        # Assuming the first summary is representative for graph generation
+        text = summaries[0]['summary']
+        triples = extract_entity_relationships(text)
 
-    # Assuming the first summary is representative for graph generation
-    text = summaries[0]['summary']
-    triples = extract_entity_relationships(text)
+        G = build_networkx_graph(triples)
 
-    G = build_networkx_graph(triples)
+        # Convert to D3-friendly JSON
+        nodes = [{"id": n} for n in G.nodes]
+        links = [{"source": u, "target": v, "label": d["label"]} for u, v, d in G.edges(data=True)]
 
-    # Convert to D3-friendly JSON
-    nodes = [{"id": n} for n in G.nodes]
-    links = [{"source": u, "target": v, "label": d["label"]} for u, v, d in G.edges(data=True)]
+        return {"nodes": nodes, "links": links}
 
-    return JSONResponse(content={"nodes": nodes, "links": links})
+    # The entity graph is only rebuilt after the digest changed
+    return cached_response(request, [resource_versions.DIGEST], build, validators=[date])
 
 
 @router.get("/")
-def get_articles():
-    # Reload news digest data to ensure latest stories are fetched
-    try:
-        with open(news_digest_filepath, 'r') as f:
-            reloaded_news_digest = json.load(f)
-    except FileNotFoundError:
-        reloaded_news_digest = [] # Handle case where file doesn't exist
+def get_articles(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    date: Optional[str] = None,
+    full: bool = False,
+):
+    date = resolve_digest_date(date)
+
+    def build():
+        # The digest cache picks up newly appended stories without re-reading the file
+        try:
+            page, total = page_digest(offset, limit, date, output_dir=news_digest_dir)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=500, detail="Error decoding news digest JSON")
+
+        if not full:
+            page = [{k: v for k, v in r.items() if k not in HEAVY_DIGEST_FIELDS} for r in page]
+
+        return {
+            "data": page,
+            "total": total,
+            "offset": offset
+        }
+
+    return cached_response(request, [resource_versions.DIGEST], build, validators=[date])
 
-    # Return actual news digest data
+@router.get("/feeds")
+def get_feeds(request: Request):
+    def build():
+        config = read_feeds_config()
+        return {"sources": config.get("sources", [])}
+    # The file signature also catches hand edits of feeds.yaml
+    return cached_response(request, [resource_versions.FEEDS], build,
+                           validators=[file_signature(feeds_config_filepath)])
+
+@router.get("/feeds/health")
+def get_feeds_health():
+    # Re-read the persisted state so runs from other processes are reflected
+    health = SourceHealthTracker().snapshot()
+    config = read_feeds_config()
     return {
-        "data": reloaded_news_digest
+        "sources": [
+            {"name": s.get("name"), **health.get(s.get("name"), {"state": "unknown"})}
+            for s in config.get("sources", [])
+        ]
     }
 
-@router.get("/feeds")
-def get_feeds():
-    config = read_feeds_config()
-    return {"sources": config.get("sources", [])}
+@router.post("/feeds/health/{name}/reset")
+def reset_feed_health(name: str):
+    tracker = SourceHealthTracker()
+    if not tracker.reset(name):
+        raise HTTPException(status_code=404, detail=f"No health state for feed source '{name}'")
+    tracker.save()
+    return {"message": f"Health state for '{name}' reset"}
 
 @router.post("/feeds")
 def add_feed(source: FeedSource):
@@ -0,0 +1,128 @@
+"""
+Response caching for read endpoints.
+
+Responses are keyed by the version tokens of the resources they are built
+from (modules/resource_versions.py), which writers bump when the data
+changes. That gives:
+
+- an ETag per response, so a client's If-None-Match gets a 304 without the
+  response being rebuilt;
+- an in-memory cache of the serialized body and its compressed variants, so
+  clients without a cached copy do not rebuild it either;
+- orjson serialization (json when it is not installed) and gzip, or brotli
+  when installed and accepted, for bodies above MIN_COMPRESS_BYTES.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from modules import resource_versions
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+MAX_CACHED_RESPONSES = 128
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def dumps(content):
+    """Serialize a JSON response body to bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def file_signature(path):
+    """Validator for files that may also be edited by hand."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    return f"{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(name.lower())
+    return accepted
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: a compressed and an identity body share one ETag
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+class _Entry:
+    def __init__(self, body):
+        self.body = body
+        self.encoded = {}
+
+    def encode(self, encoding):
+        if encoding not in self.encoded:
+            if encoding == "br":
+                self.encoded[encoding] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+            else:
+                self.encoded[encoding] = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        return self.encoded[encoding]
+
+
+def cached_response(request: Request, resources, build, validators=()):
+    """
+    JSON response for `request`, rebuilt with `build()` only when one of
+    `resources` (or an extra validator such as a resolved date) changed.
+
+    `build` may raise HTTPException; errors are not cached.
+    """
+    tokens = [resource_versions.current(resource) for resource in resources]
+    key = (request.url.path, str(request.url.query), *tokens, *map(str, validators))
+    etag = 'W/"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:24] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+    if entry is None:
+        entry = _Entry(dumps(build()))
+        with _cache_lock:
+            _cache[key] = entry
+            while len(_cache) > MAX_CACHED_RESPONSES:
+                _cache.popitem(last=False)
+
+    body = entry.body
+    if len(body) >= MIN_COMPRESS_BYTES:
+        accepted = _accepted_encodings(request)
+        encoding = "br" if brotli is not None and "br" in accepted else "gzip" if "gzip" in accepted else None
+        if encoding:
+            body = entry.encode(encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, UniqueConstraint
 from api.database import Base
 
 
@@ -11,4 +11,71 @@ class ArticleSummary(Base):
     summary = Column(String, nullable=False)
     
     
-    
\ No newline at end of file
+class IngestedArticle(Base):
+    """
+    Articles already counted into the aggregate tables, so re-runs are idempotent.
+
+    The record id marks an article whose entities were counted (and its
+    coverage with them); "coverage:<id>" marks one counted into coverage
+    only, whose entities are still missing because NER failed.
+    """
+    __tablename__ = "ingested_articles"
+
+    id = Column(String, primary_key=True)  # digest record id (hash of the URL), maybe prefixed
+    ingested_at = Column(DateTime, nullable=False)
+
+
+class EntityMentionCount(Base):
+    """Entity mention counts per time bucket ("hour", "day" or "week")."""
+    __tablename__ = "entity_mention_counts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    entity = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "entity", "category", name="uq_entity_bucket"),
+        Index("ix_entity_counts_window", "granularity", "bucket_start"),
+    )
+
+
+class CoverageCount(Base):
+    """
+    Articles ingested per run or day ("scope"), broken down by source
+    region, perspective and name ("dimension"). Rows with dimension "total"
+    hold the scope totals.
+    """
+    __tablename__ = "coverage_counts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)
+    scope_key = Column(String, nullable=False)  # run id or YYYY-MM-DD
+    dimension = Column(String, nullable=False)
+    value = Column(String, nullable=False)
+    article_count = Column(Integer, nullable=False, default=0)
+    scored_count = Column(Integer, nullable=False, default=0)  # articles with a diversity_score
+    diversity_sum = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_key", "dimension", "value", name="uq_coverage_bucket"),
+    )
+
+
+class ClusterCoverageCount(Base):
+    """Articles per story cluster, day and source perspective/region."""
+    __tablename__ = "cluster_coverage_counts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cluster_id = Column(String, nullable=False)
+    day = Column(String, nullable=False)
+    perspective = Column(String, nullable=False)
+    region = Column(String, nullable=False)
+    article_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("cluster_id", "day", "perspective", "region", name="uq_cluster_coverage"),
+        Index("ix_cluster_coverage_day", "day"),
+    )
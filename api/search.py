@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Query
+from modules.embeddings import VectorStore, embed_texts
+import os
+
+current_dir = os.path.dirname(__file__)
+embeddings_dir = os.path.join(current_dir, '..', 'output', 'embeddings')
+
+router = APIRouter()
+
+# One store per process: it memory-maps the vectors and picks up new rows
+# appended by the pipeline on each request
+store = VectorStore(embeddings_dir)
+
+def _format(results):
+    return [dict(meta, score=round(score, 4)) for meta, score in results]
+
+@router.get("/related/{article_id}")
+def get_related(article_id: str, k: int = Query(10, ge=1, le=100), other_sources: bool = True):
+    """Stories most similar to an article, by default only from other outlets."""
+    results = store.related(article_id, k, other_sources)
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"Article '{article_id}' is not in the search index")
+    return {"article_id": article_id, "related": _format(results)}
+
+@router.get("/semantic_search")
+def semantic_search(q: str = Query(..., min_length=1), k: int = Query(10, ge=1, le=100)):
+    if len(store) == 0:
+        return {"query": q, "results": []}
+    try:
+        query_vector = embed_texts([q])[0]
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Embedding model unavailable: {str(e)}")
+    return {"query": q, "results": _format(store.search(query_vector, k))}
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from api.database import get_db
+from api import crud
+
+router = APIRouter()
+
+# window name -> (bucket granularity, number of buckets)
+WINDOWS = {
+    "hour": ("hour", 1),
+    "day": ("hour", 24),
+    "week": ("day", 7),
+}
+# Baselines cover the period right before the current window
+BASELINES = {
+    "day": ("hour", 24),
+    "week": ("day", 7),
+    "month": ("day", 28),
+    "quarter": ("week", 13),
+}
+BUCKET_HOURS = {"hour": 1, "day": 24, "week": 168}
+
+# Additive smoothing so entities with no history do not get infinite scores
+SMOOTHING = 1.0
+
+def _window_counts(db, granularity, buckets, end, category):
+    start = end - timedelta(hours=BUCKET_HOURS[granularity] * buckets)
+    return crud.entity_counts_between(db, granularity, start, end, category), start
+
+@router.get("/trending")
+def get_trending(
+    window: str = "hour",
+    baseline: str = "week",
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+    min_count: int = Query(1, ge=1),
+    db: Session = Depends(get_db),
+):
+    """
+    Entities mentioned more in the current window than their baseline rate.
+
+    Reads only the pre-aggregated bucket rows: the current window is summed
+    from its buckets (ending with the current, still open one) and compared
+    with the per-hour rate over the `baseline` period before it.
+    """
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(WINDOWS)}")
+    if baseline not in BASELINES:
+        raise HTTPException(status_code=400, detail=f"baseline must be one of {', '.join(BASELINES)}")
+
+    window_granularity, window_buckets = WINDOWS[window]
+    baseline_granularity, baseline_buckets = BASELINES[baseline]
+    if BUCKET_HOURS[baseline_granularity] * baseline_buckets <= BUCKET_HOURS[window_granularity] * window_buckets:
+        raise HTTPException(status_code=400, detail="baseline must be longer than window")
+
+    now = datetime.utcnow()
+    # End of the current bucket, so the open bucket counts towards the window
+    window_end = crud.bucket_start(now, window_granularity) + timedelta(hours=BUCKET_HOURS[window_granularity])
+    current, window_start = _window_counts(db, window_granularity, window_buckets, window_end, category)
+
+    # Baseline buckets end where the window starts, rounded down to whole buckets
+    baseline_end = crud.bucket_start(window_start, baseline_granularity)
+    previous, baseline_start = _window_counts(db, baseline_granularity, baseline_buckets, baseline_end, category)
+
+    window_hours = (window_end - window_start).total_seconds() / 3600
+    baseline_hours = (baseline_end - baseline_start).total_seconds() / 3600
+
+    trending = []
+    for key, count in current.items():
+        if count < min_count:
+            continue
+        baseline_count = previous.get(key, 0)
+        expected = baseline_count / baseline_hours * window_hours
+        score = (count + SMOOTHING) / (expected + SMOOTHING)
+        if score <= 1:
+            continue
+        entity, entity_category = key
+        trending.append({
+            "entity": entity,
+            "category": entity_category,
+            "count": count,
+            "baseline_count": baseline_count,
+            "expected": round(expected, 3),
+            "score": round(score, 3),
+        })
+
+    trending.sort(key=lambda e: (e["score"], e["count"]), reverse=True)
+    return {
+        "window": {"name": window, "start": window_start.isoformat(), "end": window_end.isoformat()},
+        "baseline": {"name": baseline, "start": baseline_start.isoformat(), "end": baseline_end.isoformat()},
+        "entities": trending[:limit],
+    }
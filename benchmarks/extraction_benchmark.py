@@ -0,0 +1,114 @@
+"""
+Compare article extractors on saved HTML fixtures.
+
+Each `benchmarks/corpus/html/<name>.html` has a hand-checked `<name>.txt`
+with the expected article body. For every extractor we report throughput
+(sequential and through the process pool) and token-level precision/recall/F1
+against that text.
+
+Usage:
+    python -m benchmarks.extraction_benchmark [--repeat 20] [--workers 4] [--json out.json]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from collections import Counter
+
+from modules.extraction import EXTRACTORS, extract_articles, extract_html
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "corpus", "html")
+
+
+def load_fixtures(directory=FIXTURE_DIR):
+    fixtures = []
+    for html_path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        text_path = os.path.splitext(html_path)[0] + ".txt"
+        if not os.path.exists(text_path):
+            continue
+        with open(html_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        with open(text_path, "r", encoding="utf-8") as f:
+            expected = f.read()
+        name = os.path.basename(html_path)
+        fixtures.append({"name": name, "url": f"http://fixtures.local/{name}", "html": html, "expected": expected})
+    return fixtures
+
+
+def _tokens(text):
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def token_scores(extracted, expected):
+    got, want = _tokens(extracted), _tokens(expected)
+    overlap = sum((got & want).values())
+    precision = overlap / sum(got.values()) if got else 0.0
+    recall = overlap / sum(want.values()) if want else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def benchmark_extractor(extractor, fixtures, repeat, workers):
+    jobs = [{"url": f["url"], "html": f["html"], "extractor": extractor} for f in fixtures]
+    total_bytes = sum(len(f["html"].encode("utf-8")) for f in fixtures) * repeat
+
+    # Fidelity (one pass)
+    per_fixture = {}
+    for fixture, job in zip(fixtures, jobs):
+        result = extract_html(job)
+        per_fixture[fixture["name"]] = token_scores(result["text"], fixture["expected"])
+    mean = {k: sum(s[k] for s in per_fixture.values()) / len(per_fixture) for k in ("precision", "recall", "f1")}
+
+    # Sequential throughput
+    start = time.perf_counter()
+    extract_articles(jobs * repeat, max_workers=1)
+    sequential = time.perf_counter() - start
+
+    # Process pool throughput
+    start = time.perf_counter()
+    extract_articles(jobs * repeat, max_workers=workers)
+    pooled = time.perf_counter() - start
+
+    docs = len(jobs) * repeat
+    return {
+        "documents": docs,
+        "sequential_docs_per_sec": docs / sequential,
+        "sequential_mb_per_sec": total_bytes / sequential / 1e6,
+        "pool_workers": workers,
+        "pool_docs_per_sec": docs / pooled,
+        "pool_mb_per_sec": total_bytes / pooled / 1e6,
+        "fidelity": mean,
+        "fidelity_per_fixture": per_fixture,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="times to repeat the corpus for throughput runs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="process pool size")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="directory of .html/.txt fixture pairs")
+    parser.add_argument("--json", dest="json_path", help="write the full report to this file")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        raise SystemExit(f"No fixtures found in {args.fixtures}")
+
+    report = {}
+    for extractor in EXTRACTORS:
+        report[extractor] = benchmark_extractor(extractor, fixtures, args.repeat, args.workers)
+
+    print(f"{'extractor':<10} {'seq docs/s':>11} {'pool docs/s':>12} {'MB/s':>8} {'F1':>6}")
+    for extractor, r in report.items():
+        print(f"{extractor:<10} {r['sequential_docs_per_sec']:>11.1f} {r['pool_docs_per_sec']:>12.1f} "
+              f"{r['pool_mb_per_sec']:>8.2f} {r['fidelity']['f1']:>6.3f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
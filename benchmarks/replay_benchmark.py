@@ -0,0 +1,257 @@
+"""
+Offline replay benchmark for the end-to-end pipeline.
+
+Serves the recorded corpus in benchmarks/corpus (RSS XML + article HTML)
+from a local HTTP stand-in, then runs scrape -> translate -> summarize ->
+entities -> ingest with fixed seeds against a scratch output directory and
+database. Reports per-stage throughput, latency percentiles and peak RSS as
+JSON.
+
+Usage:
+    python -m benchmarks.replay_benchmark --out results.json [--repeat 3]
+    python -m benchmarks.replay_benchmark --compare base.json new.json [--threshold 0.1]
+
+In compare mode the exit status is 1 when any stage regressed by more than
+the threshold.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+PLACEHOLDER = b"{{BASE_URL}}"
+SEED = 1234
+
+STAGES = ("scrape", "translate", "summarize", "entities", "ingest")
+
+
+class ReplayHandler(SimpleHTTPRequestHandler):
+    """Static file handler that fills in the server address in feeds."""
+
+    base_url = ""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not path.endswith((".xml", ".yaml")) or not os.path.isfile(path):
+            return super().send_head()
+        with open(path, "rb") as f:
+            body = f.read().replace(PLACEHOLDER, self.base_url.encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml" if path.endswith(".xml") else "text/yaml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(corpus_dir=CORPUS_DIR):
+    handler = partial(ReplayHandler, directory=corpus_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    ReplayHandler.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed_everything(seed=SEED):
+    random.seed(seed)
+    try:
+        import numpy
+        numpy.random.seed(seed)
+    except ImportError:
+        pass
+    try:
+        from transformers import set_seed
+        set_seed(seed)
+    except ImportError:
+        pass
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        rss *= 1024  # KiB on Linux, bytes on macOS
+    return rss / 1e6
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def record(self, stage, total_seconds, items, latencies=None):
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "items": 0, "latencies": []})
+        entry["seconds"] += total_seconds
+        entry["items"] += items
+        entry["latencies"].extend(latencies or [total_seconds / max(items, 1)] * items)
+        entry["peak_rss_mb"] = peak_rss_mb()
+
+    def report(self):
+        report = {}
+        for stage in STAGES:
+            entry = self.stages.get(stage)
+            if not entry:
+                continue
+            latencies = entry["latencies"]
+            report[stage] = {
+                "items": entry["items"],
+                "seconds": round(entry["seconds"], 4),
+                "items_per_sec": round(entry["items"] / entry["seconds"], 3) if entry["seconds"] else None,
+                "latency_p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+                "latency_p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+                "latency_p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+                "peak_rss_mb": round(entry["peak_rss_mb"], 1),
+            }
+        return report
+
+
+def _per_item(timer, stage, items, func):
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - item_start)
+    timer.record(stage, time.perf_counter() - start, len(items), latencies)
+
+
+def run_replay(repeat=1, max_articles=5, corpus_dir=CORPUS_DIR):
+    workdir = tempfile.mkdtemp(prefix="replay_")
+    # Must be set before api.database is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'replay.sqlite3')}"
+
+    from create_db import create_database, ingest_records
+    from modules.digest_store import append_records
+    from modules.scraping import fetch_articles
+    from modules.source_health import SourceHealthTracker
+    from modules.summarization import summarize
+    from modules.translation import translate_article
+    from nlp.entity_extractor import extract_named_entities
+    from pipeline import build_record
+
+    server = start_server(corpus_dir)
+    try:
+        with open(os.path.join(corpus_dir, "feeds.yaml"), "rb") as f:
+            feeds = f.read().replace(PLACEHOLDER, ReplayHandler.base_url.encode())
+        config_path = os.path.join(workdir, "feeds.yaml")
+        with open(config_path, "wb") as f:
+            f.write(feeds)
+
+        seed_everything()
+        create_database()
+        timer = StageTimer()
+        output_dir = os.path.join(workdir, "output")
+
+        for _ in range(repeat):
+            tracker = SourceHealthTracker(state_path=os.path.join(workdir, "source_health.json"))
+            start = time.perf_counter()
+            articles = fetch_articles(max_articles=max_articles, config_path=config_path, tracker=tracker)
+            timer.record("scrape", time.perf_counter() - start, len(articles))
+
+            def translate(article):
+                article["translated_text"] = translate_article(article)
+
+            def summarize_article(article):
+                article["summary"] = summarize(article["translated_text"])
+
+            def entities(article):
+                article["entities"] = extract_named_entities(article["summary"])
+
+            _per_item(timer, "translate", articles, translate)
+            _per_item(timer, "summarize", articles, summarize_article)
+            _per_item(timer, "entities", articles, entities)
+
+            records = [build_record(a) for a in articles]
+            start = time.perf_counter()
+            append_records(records, output_dir=output_dir)
+            ingest_records(records)
+            timer.record("ingest", time.perf_counter() - start, len(records))
+    finally:
+        server.shutdown()
+
+    return {
+        "meta": {
+            "seed": SEED,
+            "repeat": repeat,
+            "max_articles": max_articles,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "stages": timer.report(),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+# (metric, True when higher is better)
+COMPARED_METRICS = (
+    ("items_per_sec", True),
+    ("latency_p95_ms", False),
+    ("peak_rss_mb", False),
+)
+
+
+def compare(base, new, threshold):
+    """List of regressions where `new` is worse than `base` by more than `threshold`."""
+    regressions = []
+    for stage, base_stage in base["stages"].items():
+        new_stage = new["stages"].get(stage)
+        if not new_stage:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, cur = base_stage.get(metric), new_stage.get(metric)
+            if not old or cur is None:
+                continue
+            change = (cur - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append({"stage": stage, "metric": metric, "base": old, "new": cur,
+                                    "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", help="write results JSON to this file (default: stdout)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the corpus this many times")
+    parser.add_argument("--max-articles", type=int, default=5, help="articles per source")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="directory with feeds.yaml, rss/ and html/")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.threshold)
+        print(json.dumps({"threshold": args.threshold, "regressions": regressions}, indent=2))
+        sys.exit(1 if regressions else 0)
+
+    results = run_replay(args.repeat, args.max_articles, args.corpus)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
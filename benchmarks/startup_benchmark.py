@@ -0,0 +1,108 @@
+"""
+Measure API import and start-up cost.
+
+Imports `main` in fresh interpreters and reports wall time, peak RSS and
+which heavy libraries got loaded. With --serve it also starts uvicorn and
+times how long until the first request is answered.
+
+Usage:
+    python -m benchmarks.startup_benchmark [--runs 5] [--serve] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["torch", "transformers", "spacy", "nltk", "newspaper", "ollama", "edge_tts"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform != "darwin":
+    rss *= 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+print(json.dumps({
+    "import_seconds": elapsed,
+    "peak_rss_mb": rss / 1e6,
+    "heavy_modules_loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import(runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "runs": runs,
+        "import_seconds_median": statistics.median(s["import_seconds"] for s in samples),
+        "import_seconds_max": max(s["import_seconds"] for s in samples),
+        "peak_rss_mb_median": statistics.median(s["peak_rss_mb"] for s in samples),
+        "heavy_modules_loaded": samples[-1]["heavy_modules_loaded"],
+    }
+
+
+def slowest_imports(limit=15):
+    """Top cumulative import times from `python -X importtime`."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000,
+                     "cumulative_ms": int(cumulative_us) / 1000})
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def measure_serve(port, timeout=60):
+    """Seconds from launching uvicorn until it answers a request."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+                               cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/api/logs/logs?limit=1", timeout=1)
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"Server did not answer within {timeout} seconds")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn start-up")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--json", dest="json_path", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = {"import": measure_import(args.runs), "slowest_imports": slowest_imports()}
+    if args.serve:
+        report["serve_seconds"] = measure_serve(args.port)
+
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
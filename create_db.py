@@ -2,18 +2,25 @@ import json
 import os
 import glob
 from datetime import datetime
+import yaml
 from sqlalchemy.orm import Session
 from api.database import Base, engine, SessionLocal
 from api import crud
+from modules.digest_store import article_id, digest_date, read_digest_file
+from modules import resource_versions
+from modules.file_lock import writer_lock
+
+FEEDS_CONFIG_PATH = "configs/feeds.yaml"
+SOURCE_FIELDS = ("region", "perspective", "diversity_score")
 
 def find_latest_json_file(directory="output"):
-    """Find the most recent news_digest JSON file in the output directory"""
+    """Find the most recent news_digest file (.jsonl or legacy .json) in the output directory"""
     if not os.path.exists(directory):
         os.makedirs(directory)
         return None
     
-    # Look for any JSON files starting with news_digest
-    pattern = os.path.join(directory, "news_digest_*.json")
+    # Look for any digest files starting with news_digest
+    pattern = os.path.join(directory, "news_digest_*.json*")
     json_files = glob.glob(pattern)
     
     if not json_files:
@@ -28,8 +35,100 @@ def create_database():
     Base.metadata.create_all(bind=engine)
     print("Database tables created.")
 
+def load_source_metadata(config_path=FEEDS_CONFIG_PATH):
+    """Region, perspective and diversity_score of each feed, by source name"""
+    try:
+        with open(config_path, "r") as f:
+            sources = (yaml.safe_load(f) or {}).get("sources", [])
+    except (OSError, yaml.YAMLError) as e:
+        print(f"⚠️ Could not read source metadata from {config_path}: {str(e)}")
+        return {}
+    return {source["name"]: {field: source.get(field) for field in SOURCE_FIELDS}
+            for source in sources if source.get("name")}
+
+def source_of(article, metadata):
+    """Coverage attributes of an article's source; records written before
+    they carried them fall back to the feeds config"""
+    source = {"source": article.get("source")}
+    fallback = metadata.get(article.get("source"), {})
+    for field in SOURCE_FIELDS:
+        value = article.get(field)
+        source[field] = value if value is not None else fallback.get(field)
+    return source
+
+def ingest_records(articles, run_id=None):
+    """Add digest records to the database: new summaries, entity and coverage aggregates"""
+    db: Session = SessionLocal()
+    metadata = load_source_metadata()
+    added_count = 0
+    try:
+        aggregated_count = 0
+        # Aggregate rows are read-modify-written; one writer at a time across processes
+        with writer_lock():
+            for article in articles:
+                summary_text = article.get("summary")
+                if summary_text:
+                    # Check if summary already exists to avoid duplicates
+                    existing = crud.get_article_summary_by_text(db, summary_text)
+                    if not existing:
+                        crud.create_article_summary(db=db, summary=summary_text)
+                        added_count += 1
+
+                # Aggregates are updated once per article, however often it is re-ingested.
+                # Without entities (NER failed) only coverage is counted, so a later
+                # ingest of the same article with entities still adds them.
+                record_id = article.get("id") or (article.get("url") and article_id(article["url"]))
+                if record_id and not crud.is_article_ingested(db, record_id):
+                    now = datetime.utcnow()
+                    when = min(crud.parse_timestamp(article.get("published")) or now, now)
+                    counted = False
+                    if crud.mark_article_ingested(db, f"coverage:{record_id}"):
+                        # Same day as the entity trends: the publication date (UTC), not today
+                        scope_keys = {"run": run_id, "day": digest_date(when)}
+                        crud.increment_coverage_counts(db, scope_keys, source_of(article, metadata),
+                                                       article.get("cluster_id"))
+                        counted = True
+                    if article.get("entities") is not None:
+                        crud.mark_article_ingested(db, record_id)
+                        crud.increment_entity_counts(db, article["entities"], when)
+                        counted = True
+                    db.commit()
+                    if counted:
+                        aggregated_count += 1
+                    
+        print(f"Added {added_count} new article summaries to database "
+              f"({aggregated_count} articles added to aggregates).")
+        return True
+        
+    except Exception as e:
+        db.rollback()
+        print(f"Error updating database: {str(e)}")
+        return False
+    finally:
+        db.close()
+        # Summaries are committed one by one, so bump even after a failure
+        if added_count:
+            resource_versions.bump(resource_versions.SUMMARIES)
+
+def replace_summaries(replacements):
+    """Swap summary texts in the database, given {old_summary: new_summary}"""
+    if not replacements:
+        return True
+    db: Session = SessionLocal()
+    try:
+        with writer_lock():
+            for old_summary, new_summary in replacements.items():
+                crud.replace_article_summary(db, old_summary, new_summary)
+        return True
+    except Exception as e:
+        print(f"Error replacing summaries: {str(e)}")
+        return False
+    finally:
+        db.close()
+        resource_versions.bump(resource_versions.SUMMARIES)
+
 def update_database_from_json(json_file_path=None):
-    """Update database with articles from JSON file"""
+    """Update database with articles from a digest file"""
     if json_file_path is None:
         json_file_path = find_latest_json_file()
     
@@ -39,40 +138,29 @@ def update_database_from_json(json_file_path=None):
     
     print(f"Reading articles from: {json_file_path}")
     
-    db: Session = SessionLocal()
     try:
-        with open(json_file_path, "r") as f:
-            articles = json.load(f)
-            
-        added_count = 0
-        for article in articles:
-            summary_text = article.get("summary")
-            if summary_text:
-                # Check if summary already exists to avoid duplicates
-                existing = crud.get_article_summary_by_text(db, summary_text)
-                if not existing:
-                    crud.create_article_summary(db=db, summary=summary_text)
-                    added_count += 1
-                    
-        print(f"Added {added_count} new article summaries to database.")
-        return True
-        
-    except FileNotFoundError:
-        print(f"Error: {json_file_path} not found.")
-        return False
+        articles = read_digest_file(json_file_path)
     except json.JSONDecodeError:
         print(f"Error: Invalid JSON in {json_file_path}")
         return False
-    except Exception as e:
-        print(f"Error updating database: {str(e)}")
+    except OSError as e:
+        print(f"Error reading {json_file_path}: {str(e)}")
         return False
-    finally:
-        db.close()
 
-def run_after_pipeline():
-    """Run database update after pipeline completion"""
+    return ingest_records(articles)
+
+def run_after_pipeline(records=None, run_id=None):
+    """Run database update after pipeline completion.
+
+    If the pipeline passes the records it produced, only those are ingested
+    (and counted into the coverage of `run_id`); otherwise the latest digest
+    file is read.
+    """
     print("🗄️ Updating database with new articles...")
-    success = update_database_from_json()
+    if records is not None:
+        success = ingest_records(records, run_id)
+    else:
+        success = update_database_from_json()
     if success:
         print("✅ Database updated successfully!")
     else:
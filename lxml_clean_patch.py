@@ -0,0 +1,15 @@
+import sys
+import types
+
+# newspaper3k imports lxml.html.clean, which now lives in the separate
+# lxml_html_clean package. Apply this before importing newspaper.
+if 'lxml.html.clean' not in sys.modules:
+    # Create a dummy module for lxml.html.clean
+    clean_module = types.ModuleType('lxml.html.clean')
+    sys.modules['lxml.html.clean'] = clean_module
+
+    # Now import the actual cleaner from the new package
+    from lxml_html_clean import Cleaner
+
+    # Patch the dummy module
+    clean_module.Cleaner = Cleaner
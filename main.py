@@ -6,25 +6,27 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+from api.coverage import router as coverage_router
 from api.graph import router as graph_router
 from api.logs import router as logs_router
+from api.search import router as search_router
+from api.trending import router as trending_router
 
-# Import necessary modules for the pipeline
+# Import necessary modules for the pipeline. Heavy libraries (torch,
+# transformers, spaCy, newspaper) are only imported when first used.
 import os
-import json
-from datetime import datetime
+import threading
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from api.database import SessionLocal, engine, get_db
 from api.models import ArticleSummary
-from api.models import Base  # Import your SQLAlchemy models
 from api import broadcast
-from modules.scraping import fetch_articles
-from modules.translation import translate_article
-from modules.summarization import summarize
-from api.crud import create_article_summary # Import create_article_summary
-from create_db import create_database, run_after_pipeline
+from modules.warmup import warm_up
+from modules.singleflight import single_flight
 app = FastAPI()
 
+# Set OBJ_WARMUP=1 (or e.g. OBJ_WARMUP=summarizer,ner) to load models at start-up
+WARMUP_ENV = "OBJ_WARMUP"
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In dev. Lock it down in prod.
@@ -35,6 +37,9 @@ app.add_middleware(
 
 
 app.include_router(broadcast.router, prefix="/api")
+app.include_router(search_router, prefix="/api")
+app.include_router(trending_router, prefix="/api")
+app.include_router(coverage_router, prefix="/api")
 
 
 # Include the router mounted at /api/graph
@@ -47,6 +52,23 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Mount the static audio directory
 app.mount("/static/audio", StaticFiles(directory="static/audio"), name="audio")
 
+@app.on_event("startup")
+def warm_up_on_startup():
+    value = os.environ.get(WARMUP_ENV, "").strip()
+    if not value or value == "0":
+        return
+    components = None if value in ("1", "all") else [c.strip() for c in value.split(",") if c.strip()]
+    # Load in the background so the server starts accepting requests immediately
+    threading.Thread(target=warm_up, args=(components,), daemon=True).start()
+
+@app.post("/api/warmup")
+def warmup_endpoint(components: str | None = None):
+    try:
+        timings = warm_up(components.split(",") if components else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "timings": timings}
+
 @app.get("/graph")
 def serve_graph_page():
     return FileResponse("static/graph.html")
@@ -57,59 +79,27 @@ def create_article_summary(db: Session, summary: str):
     db.commit()
 
 @app.get("/api/run_pipeline")
-def run_pipeline():
-    print("🚀 Starting news pipeline...")
-
+def run_pipeline(summary_engine: str | None = None):
     try:
-        # Step 1: Scrape
-        print("📰 Scraping articles...")
-        articles = fetch_articles(max_articles=1) # Use the updated max_articles
-
-        # Step 2: Process each article
-        results = []
-        for article in articles:
-            print(f"🔍 Processing: {article['title']}")
-
-            # Translate if needed
-            article['translated_text'] = translate_article(article)
-
-            # Summarize
-            article['summary'] = summarize(article['translated_text'])
-
-            results.append({
-                'title': article['title'],
-                'source': article['source'],
-                'summary': article['summary'],
-                'url': article['url'],
-                'published': article['published']
-            })
-
-        # Step 3: Output
-        timestamp = datetime.now().strftime("%Y-%m-%d")
-        output_file = os.path.join('output', f'news_digest_{timestamp}.json') # Correct path
-
-        # Ensure output directory exists
-        os.makedirs('output', exist_ok=True)
-
-        print("📝 Final results before saving:") # Add logging
-        print(json.dumps(results, indent=2)) # Print the results
-
-        # Step 4: Save JSON file
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2)
-
-        print(f"✅ Pipeline complete! Output saved to {output_file}")
-        print(f"📊 Processed {len(results)} articles")
-        
-        # Step 5: Create/update database
-        print("🗄️ Creating database tables if needed...")
-        create_database()
-        
-        # Step 6: Update database with new articles
-        run_after_pipeline()
-
-        return {"status": "success", "message": "Pipeline executed successfully."}
+        import pipeline
+
+        # Concurrent clicks with the same options share one run
+        _, shared = single_flight("run_pipeline", lambda: pipeline.run_pipeline(summary_engine), summary_engine)
+        return {"status": "success", "message": "Pipeline executed successfully.", "shared": shared}
 
     except Exception as e:
         print(f"❌ Pipeline failed: {str(e)}")
         return {"status": "error", "message": str(e)}
+
+
+@app.post("/api/upgrade_summaries")
+def upgrade_summaries(date: str | None = None, clusters: str | None = None, limit: int | None = None):
+    try:
+        import pipeline
+
+        upgraded = pipeline.upgrade_summaries(date, clusters.split(",") if clusters else None, limit)
+        return {"status": "success", "upgraded": len(upgraded)}
+
+    except Exception as e:
+        print(f"❌ Summary upgrade failed: {str(e)}")
+        return {"status": "error", "message": str(e)}
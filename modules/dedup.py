@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+import logging
+
+import numpy as np
+
+from modules.summarization import SUMMARY_ENGINES
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_INDEX_PATH = os.path.join("output", "story_clusters.json")
+
+# MinHash parameters. Changing any of these invalidates the persisted index,
+# which is then rebuilt from scratch.
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+SEED = 1
+_PRIME = (1 << 31) - 1
+
+# Candidates from the LSH buckets must also reach this estimated Jaccard
+# similarity to join a cluster. 32 bands of 4 rows put the LSH S-curve
+# midpoint at ~0.42, so true matches above this are found with high odds.
+SIMILARITY_THRESHOLD = 0.5
+
+# Clusters not seen for this long are dropped from the index
+RETENTION_DAYS = 7
+
+_rng = np.random.RandomState(SEED)
+_PERM_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+
+def _shingles(text, size=SHINGLE_SIZE):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text):
+    """MinHash signature (NUM_PERM uint32 values) of the word shingles of `text`."""
+    shingles = _shingles(text)
+    if not shingles:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint32)
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p for every permutation/shingle pair, then min per permutation
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimated_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def _band_keys(signature):
+    bands = signature.reshape(BANDS, ROWS)
+    return [f"{i}:{hashlib.blake2b(band.tobytes(), digest_size=8).hexdigest()}"
+            for i, band in enumerate(bands)]
+
+
+def _params():
+    return {"num_perm": NUM_PERM, "bands": BANDS, "shingle_size": SHINGLE_SIZE, "seed": SEED}
+
+
+class StoryClusterIndex:
+    """
+    Persistent MinHash LSH index of story clusters.
+
+    Each cluster keeps the signature of its first article (the representative),
+    the summary produced for it and the articles from other sources that were
+    matched to it. The index is saved as JSON so later runs can attach new
+    copies of a story to an existing cluster and reuse its summary.
+    """
+
+    def __init__(self, path=CLUSTER_INDEX_PATH, retention_days=RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self.clusters = {}
+        self._signatures = {}
+        self._buckets = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("params") != _params():
+            logger.warning("Story cluster index was built with different parameters, starting a new one")
+            return
+
+        cutoff = time.time() - self.retention_days * 86400
+        for cluster_id, cluster in data.get("clusters", {}).items():
+            if cluster.get("updated", 0) < cutoff:
+                continue
+            self.clusters[cluster_id] = cluster
+            self._index(cluster_id, np.array(cluster["signature"], dtype=np.uint32))
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({"params": _params(), "clusters": self.clusters})
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _index(self, cluster_id, signature):
+        self._signatures[cluster_id] = signature
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, []).append(cluster_id)
+
+    def _best_match(self, signature):
+        candidates = set()
+        for key in _band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        best_id, best_score = None, SIMILARITY_THRESHOLD
+        for cluster_id in candidates:
+            score = estimated_similarity(signature, self._signatures[cluster_id])
+            if score >= best_score:
+                best_id, best_score = cluster_id, score
+        return best_id
+
+    def assign(self, article):
+        """
+        Attach `article` to its story cluster, creating one if needed.
+
+        Returns (cluster_id, is_new_cluster).
+        """
+        signature = minhash_signature(f"{article.get('title') or ''}\n{article.get('text') or ''}")
+        member = {"url": article["url"], "source": article["source"], "title": article.get("title")}
+        now = time.time()
+
+        with self._lock:
+            cluster_id = self._best_match(signature)
+            if cluster_id is None:
+                cluster_id = hashlib.sha1(article["url"].encode("utf-8")).hexdigest()[:16]
+                self.clusters[cluster_id] = {
+                    "signature": signature.tolist(),
+                    "representative": article["url"],
+                    "summary": None,
+                    "members": [member],
+                    "created": now,
+                    "updated": now,
+                }
+                self._index(cluster_id, signature)
+                return cluster_id, True
+
+            cluster = self.clusters[cluster_id]
+            if all(m["url"] != member["url"] for m in cluster["members"]):
+                cluster["members"].append(member)
+            cluster["updated"] = now
+            return cluster_id, False
+
+    def summary(self, cluster_id, engine=None):
+        """
+        Stored summary of the cluster, or None.
+
+        With `engine`, a summary is only returned if it came from that engine
+        or a more expensive one (see SUMMARY_ENGINES).
+        """
+        cluster = self.clusters[cluster_id]
+        if cluster.get("summary") is None:
+            return None
+        if engine is not None:
+            stored = cluster.get("summary_engine") or "abstractive"
+            if SUMMARY_ENGINES.index(stored) < SUMMARY_ENGINES.index(engine):
+                return None
+        return cluster["summary"]
+
+    def set_summary(self, cluster_id, summary, engine=None):
+        with self._lock:
+            self.clusters[cluster_id]["summary"] = summary
+            self.clusters[cluster_id]["summary_engine"] = engine
+
+    def merge(self, other, cluster_ids):
+        """
+        Fold `cluster_ids` from `other` (an index loaded earlier and updated
+        since) into this one: members are united and the summary from the
+        more expensive engine wins. Lets a run re-load the index just before
+        saving instead of holding it for its whole duration.
+        """
+        with self._lock:
+            for cluster_id in cluster_ids:
+                theirs = other.clusters.get(cluster_id)
+                if theirs is None:
+                    continue
+                mine = self.clusters.get(cluster_id)
+                if mine is None:
+                    self.clusters[cluster_id] = theirs
+                    self._index(cluster_id, np.array(theirs["signature"], dtype=np.uint32))
+                    continue
+                urls = {m["url"] for m in mine["members"]}
+                mine["members"].extend(m for m in theirs["members"] if m["url"] not in urls)
+                mine["updated"] = max(mine.get("updated", 0), theirs.get("updated", 0))
+                if theirs.get("summary") is not None and (
+                        mine.get("summary") is None
+                        or SUMMARY_ENGINES.index(theirs.get("summary_engine") or "abstractive")
+                        >= SUMMARY_ENGINES.index(mine.get("summary_engine") or "abstractive")):
+                    mine["summary"] = theirs["summary"]
+                    mine["summary_engine"] = theirs.get("summary_engine")
+
+    def related(self, cluster_id, url):
+        """Other members of the cluster, as cross-source links for `url`."""
+        return [{"source": m["source"], "url": m["url"], "title": m.get("title")}
+                for m in self.clusters[cluster_id]["members"] if m["url"] != url]
+
+
+def cluster_articles(articles, index):
+    """
+    Group scraped articles into story clusters.
+
+    Returns a list of (cluster_id, members) in first-seen order; the first
+    member of a new cluster is its representative. Near-duplicates are only
+    found within a language since signatures are taken before translation.
+    """
+    groups = {}
+    for article in articles:
+        cluster_id, _ = index.assign(article)
+        groups.setdefault(cluster_id, []).append(article)
+    logger.info(f"Clustered {len(articles)} articles into {len(groups)} stories")
+    return list(groups.items())
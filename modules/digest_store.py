@@ -0,0 +1,188 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from modules import resource_versions
+from modules.file_lock import writer_lock
+
+OUTPUT_DIR = "output"
+
+# Records are keyed by URL: a later record for the same URL (e.g. a re-run on
+# the same day) replaces the earlier one when the digest is read back.
+RECORD_KEY = "url"
+
+
+def article_id(url):
+    """Stable short identifier for an article, derived from its URL."""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def digest_date(date=None):
+    """Normalise `date` (None, datetime or 'YYYY-MM-DD') to a date string."""
+    if date is None:
+        date = datetime.now()
+    if isinstance(date, datetime):
+        return date.strftime("%Y-%m-%d")
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", date):
+        raise ValueError(f"Invalid digest date: {date!r}")
+    return date
+
+
+def digest_path(date=None, output_dir=OUTPUT_DIR):
+    """Path of the JSON Lines digest for `date` (today by default)."""
+    return os.path.join(output_dir, f"news_digest_{digest_date(date)}.jsonl")
+
+
+def legacy_digest_path(date=None, output_dir=OUTPUT_DIR):
+    """Path of the old whole-file JSON digest for `date`."""
+    return os.path.join(output_dir, f"news_digest_{digest_date(date)}.json")
+
+
+def list_digest_dates(output_dir=OUTPUT_DIR):
+    """All dates that have a digest (either format), oldest first."""
+    dates = set()
+    for path in glob.glob(os.path.join(output_dir, "news_digest_*.json*")):
+        match = re.search(r"news_digest_(\d{4}-\d{2}-\d{2})\.jsonl?$", path)
+        if match:
+            dates.add(match.group(1))
+    return sorted(dates)
+
+
+def append_records(records, date=None, output_dir=OUTPUT_DIR):
+    """Append records to the day's digest. Cost is proportional to `records`."""
+    if not records:
+        return
+    path = digest_path(date, output_dir)
+    lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    os.makedirs(output_dir, exist_ok=True)
+    with writer_lock():
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+    resource_versions.bump(resource_versions.DIGEST)
+
+
+class _CachedFile:
+    def __init__(self):
+        self.signature = None
+        self.offset = 0
+        self.records = []
+        self.positions = {}
+
+
+class DigestCache:
+    """
+    In-memory cache of parsed digest files.
+
+    A file is only re-read when its (inode, mtime, size) signature changes.
+    Appended JSON Lines files are read incrementally from the last offset, so
+    a refresh costs O(new records); unchanged files cost a single stat().
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def read(self, path):
+        """Parsed records of `path`. Callers must treat the list as read-only."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._files.pop(path, None)
+            return []
+
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached.signature == signature:
+                return cached.records
+
+            if path.endswith(".jsonl"):
+                appended = (cached is not None
+                            and cached.signature[0] == stat.st_ino
+                            and stat.st_size >= cached.offset)
+                if not appended:
+                    cached = _CachedFile()
+                self._read_tail(path, cached)
+            else:
+                cached = _CachedFile()
+                self._read_whole(path, cached)
+
+            cached.signature = signature
+            self._files[path] = cached
+            return cached.records
+
+    def _read_tail(self, path, cached):
+        with open(path, "rb") as f:
+            f.seek(cached.offset)
+            data = f.read()
+        # Ignore a trailing partial line; it is picked up on the next read
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._add(cached, json.loads(line))
+        cached.offset += end
+
+    def _read_whole(self, path, cached):
+        with open(path, "r", encoding="utf-8") as f:
+            for record in json.load(f):
+                self._add(cached, record)
+
+    @staticmethod
+    def _add(cached, record):
+        key = record.get(RECORD_KEY)
+        if key is not None and key in cached.positions:
+            cached.records[cached.positions[key]] = record
+            return
+        if key is not None:
+            cached.positions[key] = len(cached.records)
+        cached.records.append(record)
+
+
+_cache = DigestCache()
+
+
+def read_digest_file(path):
+    """Records of a single digest file, through the shared cache."""
+    return _cache.read(path)
+
+
+def read_digest(date=None, output_dir=OUTPUT_DIR):
+    """
+    All records for `date` (today by default).
+
+    Legacy `.json` digests are still read; records from the `.jsonl` file take
+    precedence for the same URL. Days whose digest files were pruned are read
+    from the archive.
+    """
+    legacy = _cache.read(legacy_digest_path(date, output_dir))
+    current = _cache.read(digest_path(date, output_dir))
+    if not legacy and not current:
+        return _read_archived(date, output_dir)
+    if not legacy:
+        return current
+    if not current:
+        return legacy
+    keys = {r.get(RECORD_KEY) for r in current}
+    return [r for r in legacy if r.get(RECORD_KEY) not in keys] + current
+
+
+def _read_archived(date, output_dir):
+    """Records of a day whose digest files were pruned after archiving (modules/archive.py)."""
+    archive_dir = os.path.join(output_dir, "archive")
+    if not os.path.exists(os.path.join(archive_dir, f"date={digest_date(date)}", "part-0.parquet")):
+        return []
+    from modules.archive import read_archived_digest  # pyarrow is only needed once days are archived
+    return read_archived_digest(date, archive_dir)
+
+
+def page_digest(offset=0, limit=None, date=None, output_dir=OUTPUT_DIR):
+    """A slice of the day's records plus the total count."""
+    records = read_digest(date, output_dir)
+    end = None if limit is None else offset + limit
+    return records[offset:end], len(records)
@@ -0,0 +1,101 @@
+# Apply lxml.html.clean patch before importing newspaper
+import lxml_clean_patch
+
+import os
+import re
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACTOR = "newspaper"
+EXTRACTORS = ("newspaper", "fast")
+
+# Below this many documents the process pool start-up costs more than it saves
+MIN_POOL_JOBS = 4
+MAX_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+# Workers must not fork the caller: the pipeline and the API run threads
+# (downloads, model loading) whose locks a forked child could inherit held
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+BLOCK_TAGS = ("p", "h1", "h2", "h3", "h4", "li", "blockquote", "pre")
+
+
+def extract_newspaper(url, html):
+    """Full newspaper3k boilerplate removal. Slow but robust."""
+    from newspaper import Article
+
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return {"title": article.title, "text": article.text}
+
+
+def extract_fast(url, html):
+    """
+    Lightweight extraction with readability-lxml.
+
+    Returns paragraphs separated by blank lines, like newspaper3k does, so the
+    downstream chunking and sentence splitting behave the same.
+    """
+    try:
+        from readability import Document
+        import lxml.html
+    except ImportError:
+        logger.warning("readability-lxml is not installed, falling back to newspaper extractor")
+        return extract_newspaper(url, html)
+
+    document = Document(html)
+    content = lxml.html.fromstring(document.summary(html_partial=True))
+
+    paragraphs = []
+    for element in content.iter(*BLOCK_TAGS):
+        # Nested blocks (e.g. <p> inside <li>) are picked up by the outer one
+        if any(parent.tag in BLOCK_TAGS for parent in element.iterancestors()):
+            continue
+        text = re.sub(r"\s+", " ", element.text_content()).strip()
+        if text:
+            paragraphs.append(text)
+
+    text = "\n\n".join(paragraphs) or re.sub(r"\s+", " ", content.text_content()).strip()
+    return {"title": document.short_title(), "text": text}
+
+
+def extract_html(job):
+    """
+    Extract title and text from downloaded HTML.
+
+    `job` is a dict with `url`, `html` and optional `extractor`. Runs in a
+    worker process, so it only takes and returns plain picklable data.
+    """
+    extractor = job.get("extractor") or DEFAULT_EXTRACTOR
+    try:
+        if extractor == "fast":
+            result = extract_fast(job["url"], job["html"])
+        else:
+            result = extract_newspaper(job["url"], job["html"])
+        result["error"] = None
+    except Exception as e:
+        result = {"title": None, "text": "", "error": str(e)}
+    return result
+
+
+def extract_articles(jobs, max_workers=MAX_WORKERS):
+    """
+    Extract a batch of downloaded pages, in a process pool when it pays off.
+
+    Results are returned in the same order as `jobs`.
+    """
+    if not jobs:
+        return []
+
+    if max_workers <= 1 or len(jobs) < MIN_POOL_JOBS:
+        return [extract_html(job) for job in jobs]
+
+    workers = min(max_workers, len(jobs))
+    logger.info(f"Extracting {len(jobs)} articles with {workers} worker processes")
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context(POOL_START_METHOD)) as executor:
+        return list(executor.map(extract_html, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
@@ -0,0 +1,68 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the lock is then per process only
+    fcntl = None
+
+WRITER_LOCK_PATH = os.path.join("output", ".writer.lock")
+
+
+class InterProcessLock:
+    """
+    Reentrant lock shared by threads and processes on one host.
+
+    Threads serialize on an RLock; the first acquisition in a thread also
+    takes an exclusive flock() on `path`, released when the outermost
+    holder exits. Nested use (a writer calling a helper that takes the lock
+    too) therefore does not deadlock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a")
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+_writer_lock = InterProcessLock(WRITER_LOCK_PATH)
+
+
+@contextmanager
+def writer_lock():
+    """Serializes writers of the digest, story cluster index, vector store and database."""
+    with _writer_lock:
+        yield
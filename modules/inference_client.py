@@ -0,0 +1,41 @@
+import os
+
+import requests
+
+# Base URL of the shared model server (modules/inference_server.py), e.g.
+# http://127.0.0.1:8700. When unset, models are loaded in-process.
+INFERENCE_URL_ENV = "OBJ_INFERENCE_URL"
+INFERENCE_TIMEOUT = float(os.environ.get("OBJ_INFERENCE_TIMEOUT", "300"))
+
+_session = requests.Session()
+
+
+def inference_url():
+    return os.environ.get(INFERENCE_URL_ENV, "").rstrip("/")
+
+
+def enabled():
+    """True when model calls should go to the shared inference server."""
+    return bool(inference_url())
+
+
+def _post(path, payload):
+    response = _session.post(f"{inference_url()}{path}", json=payload, timeout=INFERENCE_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["results"]
+
+
+def summarize_texts(texts, max_length=150, min_length=30):
+    return _post("/summarize", {"texts": texts, "max_length": max_length, "min_length": min_length})
+
+
+def translate_texts(texts, source_lang, target_lang="en"):
+    return _post("/translate", {"texts": texts, "source_lang": source_lang, "target_lang": target_lang})
+
+
+def analyze_entities(texts):
+    return _post("/ner", {"texts": texts})
+
+
+def embed_texts(texts):
+    return _post("/embed", {"texts": texts})
@@ -0,0 +1,193 @@
+"""
+Shared model server for summarization, translation, NER and embeddings.
+
+Run a single process per host, e.g.
+
+    uvicorn modules.inference_server:app --host 127.0.0.1 --port 8700
+
+and point API workers and pipelines at it with
+OBJ_INFERENCE_URL=http://127.0.0.1:8700. Models are then loaded once per host
+instead of once per worker, and concurrent requests from different callers
+are grouped into micro-batches.
+"""
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import List
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from modules.warmup import warm_up
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = int(os.environ.get("OBJ_INFERENCE_MAX_BATCH", "16"))
+MAX_WAIT_MS = float(os.environ.get("OBJ_INFERENCE_MAX_WAIT_MS", "10"))
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads and runs them in batches.
+
+    A batch is dispatched when it reaches `max_batch_size` or when the oldest
+    item has waited `max_wait_ms`. `handler` takes a list of items and returns
+    a list of results in the same order.
+    """
+
+    def __init__(self, name, handler, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.name = name
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, items):
+        """Queue `items` and block until all their results are ready."""
+        futures = []
+        for item in items:
+            future = Future()
+            self._queue.put((item, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = list(self.handler(items))
+                if len(results) != len(batch):
+                    # Results cannot be matched to callers; fail them all rather than leave some waiting
+                    raise RuntimeError(f"{self.name} handler returned {len(results)} results for {len(batch)} items")
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batch of {len(items)} failed in {self.name}: {e}", exc_info=True)
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+def _summarize_batch(max_length, min_length):
+    def handler(texts):
+        from modules.summarization import get_summarizer
+        outputs = get_summarizer()(texts, max_length=max_length, min_length=min_length,
+                                   do_sample=False, batch_size=len(texts))
+        return [output['summary_text'] for output in outputs]
+    return handler
+
+
+def _translate_batch(source_lang, target_lang):
+    def handler(texts):
+        from modules.translation import get_translator
+        outputs = get_translator(source_lang, target_lang)(texts, batch_size=len(texts))
+        return [output['translation_text'] for output in outputs]
+    return handler
+
+
+def _ner_batch(texts):
+    from nlp.entity_extractor import analyze_texts_locally
+    return analyze_texts_locally(texts)
+
+
+def _embed_batch(texts):
+    from modules.embeddings import embed_texts_locally
+    return embed_texts_locally(texts).tolist()
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(key, handler_factory):
+    """One batcher per task and parameter set, so every batch is homogeneous."""
+    with _batchers_lock:
+        if key not in _batchers:
+            _batchers[key] = MicroBatcher("/".join(map(str, key)), handler_factory())
+        return _batchers[key]
+
+
+app = FastAPI(title="Objective Newsfeed inference server")
+
+
+class SummarizeRequest(BaseModel):
+    texts: List[str]
+    max_length: int = 150
+    min_length: int = 30
+
+
+class TranslateRequest(BaseModel):
+    texts: List[str]
+    source_lang: str
+    target_lang: str = "en"
+
+
+class NerRequest(BaseModel):
+    texts: List[str]
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+
+@app.on_event("startup")
+def warm_up_on_startup():
+    # Unlike the API, the model server loads everything up front unless told not to
+    value = os.environ.get("OBJ_WARMUP", "1").strip()
+    if value and value != "0":
+        components = None if value in ("1", "all") else [c.strip() for c in value.split(",") if c.strip()]
+        threading.Thread(target=warm_up, args=(components,), kwargs={"local": True}, daemon=True).start()
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "batchers": sorted(b.name for b in _batchers.values())}
+
+
+@app.post("/summarize")
+def summarize_endpoint(request: SummarizeRequest):
+    batcher = get_batcher(("summarize", request.max_length, request.min_length),
+                          lambda: _summarize_batch(request.max_length, request.min_length))
+    return {"results": _submit(batcher, request.texts)}
+
+
+@app.post("/translate")
+def translate_endpoint(request: TranslateRequest):
+    batcher = get_batcher(("translate", request.source_lang, request.target_lang),
+                          lambda: _translate_batch(request.source_lang, request.target_lang))
+    return {"results": _submit(batcher, request.texts)}
+
+
+@app.post("/ner")
+def ner_endpoint(request: NerRequest):
+    batcher = get_batcher(("ner",), lambda: _ner_batch)
+    return {"results": _submit(batcher, request.texts)}
+
+
+@app.post("/embed")
+def embed_endpoint(request: EmbedRequest):
+    batcher = get_batcher(("embed",), lambda: _embed_batch)
+    return {"results": _submit(batcher, request.texts)}
+
+
+def _submit(batcher, texts):
+    try:
+        return batcher.submit(texts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"{batcher.name} failed: {str(e)}")
+
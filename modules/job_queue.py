@@ -0,0 +1,308 @@
+"""
+Durable queue of pipeline work items.
+
+Jobs are leased rather than popped: a worker that leases a job owns it until
+the visibility timeout expires, after which any worker may lease it again.
+A worker that crashes mid-job therefore loses nothing, the job simply
+reappears. Completing a job and enqueueing its follow-up jobs happens in one
+transaction, so a run resumes exactly where it stopped.
+
+Backends are chosen by URL scheme (OBJ_QUEUE_URL, default
+sqlite:///output/jobs.db); `register_backend` adds others, e.g. for a
+database shared between machines.
+"""
+import json
+from abc import ABC, abstractmethod
+import os
+import random
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUE_URL_ENV = "OBJ_QUEUE_URL"
+DEFAULT_QUEUE_URL = "sqlite:///" + os.path.join("output", "jobs.db")
+
+VISIBILITY_TIMEOUT_SECONDS = 600
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30.0
+RETRY_MAX_SECONDS = 3600.0
+
+# Job states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler when retrying cannot help; the job goes straight to dead."""
+
+
+class Job:
+    """A leased work item."""
+
+    def __init__(self, id, stage, payload, attempts, max_attempts, lease_owner):
+        self.id = id
+        self.stage = stage
+        self.payload = payload
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.lease_owner = lease_owner
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.stage}, attempt {self.attempts}/{self.max_attempts})"
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter before attempt `attempts + 1`."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobQueue(ABC):
+    """
+    Interface every backend implements.
+
+    `enqueue` takes an optional `dedup_key`; a job whose key already exists
+    (in any state) is not added again and `enqueue` returns None, which keeps
+    re-delivered jobs from duplicating their follow-ups. Otherwise it returns
+    the new job's id. Higher `priority` jobs are leased first.
+    """
+
+    @abstractmethod
+    def enqueue(self, stage, payload, dedup_key=None, priority=0, delay=0, max_attempts=MAX_ATTEMPTS):
+        """Add a job; returns its id, or None if `dedup_key` already exists."""
+
+    @abstractmethod
+    def lease(self, worker_id, stages=None, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS):
+        """Next available job (pending, or leased with an expired lease), or None."""
+
+    @abstractmethod
+    def extend(self, job, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS):
+        """Push back the lease expiry; False if the lease was lost."""
+
+    @abstractmethod
+    def complete(self, job, next_jobs=()):
+        """
+        Mark `job` done and enqueue `next_jobs` (dicts of `enqueue` keyword
+        arguments) atomically. False if the lease was lost, in which case
+        nothing is written.
+        """
+
+    @abstractmethod
+    def fail(self, job, error, permanent=False):
+        """Schedule a retry with backoff, or mark the job dead once out of attempts."""
+
+    @abstractmethod
+    def counts(self):
+        """{stage: {status: count}}"""
+
+    @abstractmethod
+    def requeue_dead(self, stage=None):
+        """Give dead jobs a fresh set of attempts; returns how many."""
+
+    @abstractmethod
+    def purge(self, older_than_seconds):
+        """Delete done jobs last updated more than `older_than_seconds` ago."""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Queue in a single SQLite file, safe for many worker processes on one host.
+
+    Runs in WAL mode; leasing takes the write lock (BEGIN IMMEDIATE) so two
+    workers never lease the same job.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stage TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                dedup_key TEXT UNIQUE,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (status, priority, available_at);
+        """)
+
+    def _conn(self):
+        # One connection per thread; sqlite3 connections must not be shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._conn())
+
+    def _insert(self, conn, stage, payload, dedup_key=None, priority=0, delay=0, max_attempts=MAX_ATTEMPTS):
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO jobs (stage, payload, dedup_key, priority, status, max_attempts, "
+            "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (stage, json.dumps(payload, ensure_ascii=False), dedup_key, priority, PENDING,
+             max_attempts, now + delay, now, now))
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def enqueue(self, stage, payload, dedup_key=None, priority=0, delay=0, max_attempts=MAX_ATTEMPTS):
+        with self._transaction() as conn:
+            job_id = self._insert(conn, stage, payload, dedup_key, priority, delay, max_attempts)
+        if job_id is None:
+            logger.warning(f"Not enqueued: a {stage} job with key {dedup_key!r} already exists")
+        return job_id
+
+    def lease(self, worker_id, stages=None, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS):
+        stage_filter = ""
+        params = []
+        if stages:
+            stage_filter = f" AND stage IN ({', '.join('?' for _ in stages)})"
+            params = list(stages)
+
+        with self._transaction() as conn:
+            while True:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT id, stage, payload, attempts, max_attempts, status FROM jobs "
+                    "WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires <= ?))"
+                    f"{stage_filter} ORDER BY priority DESC, available_at, id LIMIT 1",
+                    [PENDING, now, LEASED, now] + params).fetchone()
+                if row is None:
+                    return None
+                job_id, stage, payload, attempts, max_attempts, status = row
+
+                # An expired lease means the worker died or hung; that counts as an attempt
+                if status == LEASED and attempts >= max_attempts:
+                    conn.execute("UPDATE jobs SET status = ?, lease_owner = NULL, last_error = ?, "
+                                 "updated_at = ? WHERE id = ?",
+                                 (DEAD, "lease expired on final attempt", now, job_id))
+                    logger.warning(f"Job {job_id} ({stage}) is dead: lease expired on final attempt")
+                    continue
+
+                conn.execute("UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                             "lease_expires = ?, updated_at = ? WHERE id = ?",
+                             (LEASED, worker_id, now + visibility_timeout, now, job_id))
+                return Job(job_id, stage, json.loads(payload), attempts + 1, max_attempts, worker_id)
+
+    def extend(self, job, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS):
+        with self._transaction() as conn:
+            now = time.time()
+            cursor = conn.execute("UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                                  "WHERE id = ? AND status = ? AND lease_owner = ?",
+                                  (now + visibility_timeout, now, job.id, LEASED, job.lease_owner))
+            return cursor.rowcount == 1
+
+    def complete(self, job, next_jobs=()):
+        try:
+            with self._transaction() as conn:
+                cursor = conn.execute("UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                                      "last_error = NULL, updated_at = ? "
+                                      "WHERE id = ? AND status = ? AND lease_owner = ?",
+                                      (DONE, time.time(), job.id, LEASED, job.lease_owner))
+                if cursor.rowcount != 1:
+                    raise _LeaseLost()
+                for next_job in next_jobs:
+                    self._insert(conn, **next_job)
+            return True
+        except _LeaseLost:
+            return False
+
+    def fail(self, job, error, permanent=False):
+        now = time.time()
+        if permanent or job.attempts >= job.max_attempts:
+            status, available_at = DEAD, now
+        else:
+            status, available_at = PENDING, now + retry_delay(job.attempts)
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, "
+                                  "lease_expires = NULL, last_error = ?, updated_at = ? "
+                                  "WHERE id = ? AND status = ? AND lease_owner = ?",
+                                  (status, available_at, str(error)[:1000], now, job.id, LEASED, job.lease_owner))
+            return status if cursor.rowcount == 1 else None
+
+    def counts(self):
+        counts = {}
+        for stage, status, count in self._conn().execute(
+                "SELECT stage, status, COUNT(*) FROM jobs GROUP BY stage, status"):
+            counts.setdefault(stage, {})[status] = count
+        return counts
+
+    def requeue_dead(self, stage=None):
+        query = "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?"
+        params = [PENDING, time.time(), time.time(), DEAD]
+        if stage:
+            query += " AND stage = ?"
+            params.append(stage)
+        with self._transaction() as conn:
+            return conn.execute(query, params).rowcount
+
+    def purge(self, older_than_seconds):
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM jobs WHERE status = ? AND updated_at < ?",
+                                (DONE, time.time() - older_than_seconds)).rowcount
+
+
+class _LeaseLost(Exception):
+    pass
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
+
+
+_backends = {}
+
+
+def register_backend(scheme, factory):
+    """Make `open_queue` build queues for `scheme://...` URLs with `factory(location)`."""
+    _backends[scheme] = factory
+
+
+def _sqlite_backend(location):
+    # Same convention as SQLAlchemy: sqlite:///relative/path, sqlite:////absolute/path
+    return SQLiteJobQueue(location[1:] if location.startswith("/") else location)
+
+
+register_backend("sqlite", _sqlite_backend)
+
+
+def open_queue(url=None):
+    """Queue for `url`, $OBJ_QUEUE_URL or the default SQLite file."""
+    url = url or os.environ.get(QUEUE_URL_ENV) or DEFAULT_QUEUE_URL
+    scheme, separator, location = url.partition("://")
+    if not separator or scheme not in _backends:
+        raise ValueError(f"Unsupported job queue URL: {url!r} (backends: {', '.join(sorted(_backends))})")
+    return _backends[scheme](location)
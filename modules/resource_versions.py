@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+VERSIONS_DIR = os.path.join("output", "versions")
+
+# Resources whose readers cache responses (see api/http_cache.py)
+SUMMARIES = "summaries"  # article summaries in the database
+DIGEST = "digest"        # news digest files
+FEEDS = "feeds"          # configs/feeds.yaml
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _path(resource, directory):
+    return os.path.join(directory, resource)
+
+
+def bump(resource, directory=VERSIONS_DIR):
+    """
+    Give `resource` a new version token after it changed.
+
+    Each resource has its own small file, replaced atomically, so writers in
+    other processes (e.g. the pipeline) invalidate the API's caches too.
+    """
+    token = f"{time.time_ns():x}-{os.urandom(4).hex()}"
+    os.makedirs(directory, exist_ok=True)
+    path = _path(resource, directory)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(token)
+    os.replace(tmp_path, path)
+    return token
+
+
+def current(resource, directory=VERSIONS_DIR):
+    """Current version token of `resource` ("0" if it was never bumped); one stat() when unchanged."""
+    path = _path(resource, directory)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "0"
+    signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    try:
+        with open(path, "r") as f:
+            token = f.read().strip()
+    except FileNotFoundError:
+        return "0"
+    with _lock:
+        _cache[path] = (signature, token)
+    return token
@@ -1,89 +1,209 @@
-import sys
-import types
-
-# Create a dummy module for lxml.html.clean
-clean_module = types.ModuleType('lxml.html.clean')
-sys.modules['lxml.html.clean'] = clean_module
-
-# Now import the actual cleaner from the new package
-from lxml_html_clean import Cleaner
-
-# Patch the dummy module
-clean_module.Cleaner = Cleaner
+# Apply lxml.html.clean patch before importing newspaper
+import lxml_clean_patch
 
 import atoma
 import requests
-from newspaper import Article
+from newspaper import Config, network
 import yaml
 import time
 import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from modules.extraction import DEFAULT_EXTRACTOR, extract_articles
+from modules.source_health import (
+    Deadline,
+    RetryBudget,
+    SourceHealthTracker,
+    SOURCE_DEADLINE_SECONDS,
+    call_with_retries,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+RSS_TIMEOUT = 10
+ARTICLE_TIMEOUT = 10
+DOWNLOAD_WORKERS = 8
+
+
+class SourceFetchError(Exception):
+    """Raised when a source yields no articles."""
+
 
 
 def load_feeds(config_path="configs/feeds.yaml"):
     with open(config_path, 'r') as f:
         return yaml.safe_load(f)['sources']
 
-def fetch_articles(max_articles=1):
-    start_time = time.time()
-    sources = load_feeds()
-    articles = []
-    
-    logger.info(f"Starting to fetch articles from {len(sources)} sources, max {max_articles} per source")
-    
-    for idx, source in enumerate(sources, 1):
-        source_start_time = time.time()
-        logger.info(f"[{idx}/{len(sources)}] Processing source: {source['name']} ({source['url']})")
-        
+def _get_feed(url, deadline):
+    response = requests.get(url, timeout=deadline.timeout(RSS_TIMEOUT))
+    response.raise_for_status()
+    return response
+
+def fetch_feed_entries(source, max_articles, budget, deadline):
+    """Fetch the RSS feed of a source and return its newest entries."""
+    logger.info(f"  Fetching RSS feed from {source['name']}...")
+    response = call_with_retries(
+        lambda: _get_feed(source['url'], deadline), budget, deadline,
+        description=f"RSS feed {source['name']}")
+    logger.info(f"  RSS feed fetched successfully ({len(response.content)} bytes)")
+
+    feed = atoma.parse_rss_bytes(response.content)
+    entries = feed.items[:max_articles]
+    logger.info(f"  Found {len(feed.items)} articles, processing up to {len(entries)}")
+
+    return [
+        {
+            'url': entry.link,
+            'published': entry.pub_date.isoformat() if entry.pub_date else ""
+        }
+        for entry in entries
+    ]
+
+def download_article_html(url, budget, deadline):
+    """Download the raw HTML of a single article, retrying transient failures."""
+    def attempt():
+        # newspaper's own request helper, called directly so the requests
+        # exception (timeout, status code) reaches call_with_retries instead
+        # of being flattened into Article.download_exception_msg
+        config = Config()
+        config.request_timeout = deadline.timeout(ARTICLE_TIMEOUT)
+        return network.get_html_2XX_only(url, config)
+
+    return call_with_retries(attempt, budget, deadline, description=f"download {url}")
+
+def build_page(source, entry, html):
+    """Downloaded page of a feed entry, with the source attributes later stages need."""
+    return {
+        'source': source['name'],
+        'url': entry['url'],
+        'language': source['lang'],
+        'published': entry['published'],
+        'extractor': source.get('extractor', DEFAULT_EXTRACTOR),
+        'summarizer': source.get('summarizer'),
+        'region': source.get('region'),
+        'perspective': source.get('perspective'),
+        'diversity_score': source.get('diversity_score'),
+        'html': html
+    }
+
+def build_article(page, result):
+    """Scraped article from a page and its extraction result."""
+    return {
+        'title': result['title'],
+        'text': result['text'],
+        'source': page['source'],
+        'url': page['url'],
+        'language': page['language'],
+        'published': page['published'],
+        'summarizer': page['summarizer'],
+        'region': page['region'],
+        'perspective': page['perspective'],
+        'diversity_score': page['diversity_score']
+    }
+
+def _download_source(source, max_articles, budget):
+    """Download up to `max_articles` pages from one source within its deadline."""
+    deadline = Deadline(source.get('deadline', SOURCE_DEADLINE_SECONDS))
+    entries = fetch_feed_entries(source, max_articles, budget, deadline)
+
+    pages = []
+    errors = []
+    for entry_idx, entry in enumerate(entries, 1):
+        if deadline.expired():
+            logger.warning(f"  Deadline reached for {source['name']}, skipping remaining articles")
+            errors.append("source deadline exceeded")
+            break
+
+        logger.info(f"    [{entry_idx}/{len(entries)}] Downloading article: {entry['url']}")
         try:
-            # Fetch and parse RSS feed
-            logger.info(f"  Fetching RSS feed from {source['name']}...")
-            response = requests.get(source['url'], timeout=10)
-            logger.info(f"  RSS feed fetched successfully ({len(response.content)} bytes)")
-            
-            feed = atoma.parse_rss_bytes(response.content)
-            feed_item_count = len(feed.items[:max_articles])
-            logger.info(f"  Found {len(feed.items)} articles, processing up to {feed_item_count}")
-            
-            for entry_idx, entry in enumerate(feed.items[:max_articles], 1):
-                article_start_time = time.time()
-                logger.info(f"    [{entry_idx}/{feed_item_count}] Fetching article: {entry.link}")
-                
-                article = Article(entry.link)
-                logger.info(f"    Downloading article content...")
-                article.download()
-                logger.info(f"    Parsing article content...")
-                article.parse()
-                
-                # Log article details
-                article_title = article.title if article.title else "Untitled"
-                article_text_length = len(article.text)
-                logger.info(f"    Article processed: '{article_title}' ({article_text_length} chars)")
-                
-                articles.append({
-                    'title': article.title,
-                    'text': article.text,
-                    'source': source['name'],
-                    'url': entry.link,
-                    'language': source['lang'],
-                    'published': entry.pub_date.isoformat() if entry.pub_date else ""
-                })
-                
-                article_time = time.time() - article_start_time
-                logger.info(f"    Article completed in {article_time:.2f} seconds")
-                
+            html = download_article_html(entry['url'], budget, deadline)
         except Exception as e:
-            logger.error(f"Error processing {source['name']}: {str(e)}", exc_info=True)
-        
-        source_time = time.time() - source_start_time
-        logger.info(f"[{idx}/{len(sources)}] Completed source: {source['name']} in {source_time:.2f} seconds")
+            logger.error(f"    Failed to fetch article {entry['url']}: {str(e)}")
+            errors.append(str(e))
+            continue
+
+        pages.append(build_page(source, entry, html))
+
+    # Only count the source as failed if nothing usable came back
+    if errors and not pages:
+        raise SourceFetchError(errors[-1])
+    return pages
+
+def _download_source_timed(source, max_articles, budget):
+    """(pages, error, seconds) for one source; errors are returned, not raised."""
+    source_start_time = time.time()
+    logger.info(f"Processing source: {source['name']} ({source['url']})")
+    try:
+        pages = _download_source(source, max_articles, budget)
+        error = None
+    except Exception as e:
+        logger.error(f"Error processing {source['name']}: {str(e)}", exc_info=True)
+        pages, error = [], e
+
+    source_time = time.time() - source_start_time
+    logger.info(f"Completed source: {source['name']} in {source_time:.2f} seconds ({len(pages)} pages)")
+    return pages, error, source_time
+
+def fetch_articles(max_articles=1, config_path="configs/feeds.yaml", tracker=None,
+                   download_workers=DOWNLOAD_WORKERS, extract_workers=None):
+    start_time = time.time()
+    sources = load_feeds(config_path)
+    tracker = tracker or SourceHealthTracker()
+    budget = RetryBudget()
     
+    logger.info(f"Starting to fetch articles from {len(sources)} sources, max {max_articles} per source")
+
+    active_sources = []
+    for source in sources:
+        if tracker.is_open(source['name']):
+            logger.warning(f"Skipping {source['name']}: circuit open after repeated failures")
+        else:
+            active_sources.append(source)
+
+    # Step 1: download concurrently (I/O bound, one thread per source)
+    pages = []
+    downloads = {}
+    with ThreadPoolExecutor(max_workers=max(1, download_workers)) as executor:
+        for source, (source_pages, error, duration) in zip(active_sources, executor.map(
+                lambda source: _download_source_timed(source, max_articles, budget),
+                active_sources)):
+            downloads[source['name']] = (len(source_pages), error, duration)
+            pages.extend(source_pages)
+    download_time = time.time() - start_time
+
+    # Step 2: extract text in worker processes (CPU bound)
+    extract_start_time = time.time()
+    extract_kwargs = {} if extract_workers is None else {'max_workers': extract_workers}
+    extracted = extract_articles(
+        [{'url': p['url'], 'html': p['html'], 'extractor': p['extractor']} for p in pages],
+        **extract_kwargs)
+
+    articles = []
+    for page, result in zip(pages, extracted):
+        if result['error'] or not result['text']:
+            logger.error(f"    Failed to extract {page['url']}: {result['error'] or 'no text found'}")
+            continue
+        logger.info(f"    Article processed: '{result['title'] or 'Untitled'}' ({len(result['text'])} chars)")
+        articles.append(build_article(page, result))
+    extract_time = time.time() - extract_start_time
+
+    # Step 3: a source is only healthy if its pages yielded articles
+    extracted_per_source = Counter(article['source'] for article in articles)
+    for name, (page_count, error, duration) in downloads.items():
+        if error is None and page_count and not extracted_per_source[name]:
+            error = SourceFetchError(f"none of {page_count} downloaded pages could be extracted")
+        if error is None:
+            tracker.record_success(name, duration)
+        else:
+            tracker.record_failure(name, error, duration)
+    tracker.save()
+
     total_time = time.time() - start_time
-    logger.info(f"Article fetching complete. Processed {len(articles)} articles from {len(sources)} sources in {total_time:.2f} seconds")
+    logger.info(f"Article fetching complete. Processed {len(articles)} articles from {len(sources)} sources in {total_time:.2f} seconds "
+                f"(download {download_time:.2f}s, extraction {extract_time:.2f}s, "
+                f"{budget.total - budget.remaining}/{budget.total} retries used)")
     
     return articles
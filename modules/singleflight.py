@@ -0,0 +1,87 @@
+"""
+Single-flight coalescing of duplicate work.
+
+While a call for a key is running, further calls for the same key do not
+start their own computation; they wait for the running one and receive its
+result (or its exception). Nothing is cached: once the call finishes the
+next request for the key runs again.
+
+Keys combine an operation name and a hash of its inputs (`flight_key`), so
+only truly identical requests are merged. Coalescing is per process; writes
+that must also be serialized across processes go through
+modules.file_lock.writer_lock.
+"""
+import hashlib
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def flight_key(operation, *inputs):
+    """Key for `operation` applied to `inputs` (anything JSON-serializable, else str())."""
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{operation}:{digest[:16]}"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """A group of in-flight calls, keyed by string."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """
+        Run `func()` unless a call for `key` is already in flight, in which
+        case wait for that one. Returns (result, shared) where `shared` is
+        True for callers that attached to another caller's computation.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            logger.info(f"Joining in-flight {key} ({call.waiters} waiting)")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        """{key: number of waiting callers} for calls currently running."""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
+
+
+# Shared by the API endpoints
+flights = SingleFlight()
+
+
+def single_flight(operation, func, *inputs):
+    """`flights.do` keyed by `operation` and `inputs`; returns (result, shared)."""
+    return flights.do(flight_key(operation, *inputs), func)
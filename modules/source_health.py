@@ -0,0 +1,228 @@
+import json
+import os
+import random
+import threading
+import time
+import logging
+
+import requests
+
+from modules.file_lock import writer_lock
+
+logger = logging.getLogger(__name__)
+
+HEALTH_STATE_PATH = os.path.join("output", "source_health.json")
+
+# Circuit breaker: open after this many consecutive failed runs of a source,
+# then skip it until the cool-down has elapsed.
+FAILURE_THRESHOLD = 3
+COOLDOWN_SECONDS = 15 * 60
+
+# Retries: per request attempts, backoff base and the total number of retries
+# allowed across all sources in a single run.
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+RUN_RETRY_BUDGET = 20
+
+# HTTP statuses worth retrying besides 5xx: the server asked us to slow down
+RETRYABLE_STATUS = frozenset({408, 429})
+
+# Upper bound on wall time spent on a single source (RSS + all articles).
+SOURCE_DEADLINE_SECONDS = 30.0
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a source has used up its time allowance."""
+
+
+class RetryBudget:
+    """Thread-safe pool of retries shared by every source in a run."""
+
+    def __init__(self, total=RUN_RETRY_BUDGET):
+        self.total = total
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def try_spend(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+class Deadline:
+    """Wall-clock allowance for one source."""
+
+    def __init__(self, seconds=SOURCE_DEADLINE_SECONDS):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap):
+        """Request timeout bounded by both `cap` and the time left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("source deadline exceeded")
+        return min(cap, remaining)
+
+
+def is_transient(error):
+    """True for failures a retry can fix: timeouts, dropped connections, 5xx and 429."""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status in RETRYABLE_STATUS
+    return False
+
+
+def call_with_retries(func, budget, deadline, description="request",
+                      max_attempts=MAX_ATTEMPTS):
+    """
+    Call `func` with exponential backoff and jitter.
+
+    Only transient errors (see `is_transient`) are retried; anything else,
+    e.g. a 404 or a malformed response, is re-raised at once. A retry is
+    only attempted while the run's retry budget has credit and the backoff
+    sleep still fits inside the source deadline; otherwise the last
+    exception is re-raised.
+    """
+    attempt = 1
+    while True:
+        try:
+            return func()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if not is_transient(e) or attempt >= max_attempts:
+                raise
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)))
+            delay = delay * (0.5 + random.random() / 2)
+            if delay >= deadline.remaining():
+                raise
+            if not budget.try_spend():
+                logger.warning(f"    Retry budget exhausted, giving up on {description}")
+                raise
+            logger.warning(f"    {description} failed ({e}), retry {attempt}/{max_attempts - 1} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+class SourceHealthTracker:
+    """
+    Per-source health state with a circuit breaker.
+
+    State is persisted to a small JSON file so the feeds API can report it even
+    when the pipeline ran in a different process.
+    """
+
+    def __init__(self, state_path=HEALTH_STATE_PATH,
+                 failure_threshold=FAILURE_THRESHOLD,
+                 cooldown_seconds=COOLDOWN_SECONDS):
+        self.state_path = state_path
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self.sources = self._load()
+        self._changed = set()
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        """
+        Write the sources this tracker changed into the state file.
+
+        Other processes (pipeline runs, queue workers) update the same file,
+        so it is re-read under the writer lock and only changed entries are
+        replaced; their updates to other sources are kept.
+        """
+        with writer_lock():
+            current = self._load()
+            with self._lock:
+                for name in self._changed:
+                    if name in self.sources:
+                        current[name] = self.sources[name]
+                    else:
+                        current.pop(name, None)
+                self._changed.clear()
+                self.sources = current
+                data = json.dumps(current, indent=2)
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, self.state_path)
+
+    def _entry(self, name):
+        self._changed.add(name)
+        return self.sources.setdefault(name, {
+            "consecutive_failures": 0,
+            "total_successes": 0,
+            "total_failures": 0,
+            "last_success": None,
+            "last_failure": None,
+            "last_error": None,
+            "last_duration": None,
+            "open_until": None,
+        })
+
+    def is_open(self, name):
+        """True while the breaker for `name` is open and the source should be skipped."""
+        with self._lock:
+            entry = self.sources.get(name)
+            if not entry or not entry.get("open_until"):
+                return False
+            return time.time() < entry["open_until"]
+
+    def record_success(self, name, duration):
+        with self._lock:
+            entry = self._entry(name)
+            entry["consecutive_failures"] = 0
+            entry["total_successes"] += 1
+            entry["last_success"] = time.time()
+            entry["last_duration"] = round(duration, 3)
+            entry["open_until"] = None
+
+    def record_failure(self, name, error, duration):
+        with self._lock:
+            entry = self._entry(name)
+            entry["consecutive_failures"] += 1
+            entry["total_failures"] += 1
+            entry["last_failure"] = time.time()
+            entry["last_error"] = str(error)[:500]
+            entry["last_duration"] = round(duration, 3)
+            if entry["consecutive_failures"] >= self.failure_threshold:
+                entry["open_until"] = time.time() + self.cooldown_seconds
+                logger.warning(f"Circuit opened for {name} after {entry['consecutive_failures']} "
+                               f"consecutive failures, skipping for {self.cooldown_seconds}s")
+
+    def reset(self, name):
+        with self._lock:
+            self._changed.add(name)
+            return self.sources.pop(name, None) is not None
+
+    def snapshot(self):
+        """Health state for every tracked source, with a derived `state` field."""
+        now = time.time()
+        with self._lock:
+            result = {}
+            for name, entry in self.sources.items():
+                if entry.get("open_until") and now < entry["open_until"]:
+                    state = "open"
+                elif entry["consecutive_failures"] > 0:
+                    state = "degraded"
+                else:
+                    state = "healthy"
+                result[name] = dict(entry, state=state)
+            return result
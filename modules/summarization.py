@@ -1,30 +1,166 @@
-from transformers import pipeline
-import nltk
-from nltk.tokenize import sent_tokenize
+import os
+import re
+import threading
 
-# Download punkt tokenizer models
-nltk.download('punkt')
+import numpy as np
+
+from modules import inference_client
+
+# transformers/torch and nltk are imported on first use so that importing
+# this module (e.g. from the API server) stays cheap.
+SUMMARIZATION_MODEL = "sshleifer/distilbart-cnn-12-6"
+
+# "abstractive" runs distilbart; "extractive" is the vectorized TextRank tier
+SUMMARY_ENGINES = ("extractive", "abstractive")  # cheapest first
+DEFAULT_SUMMARY_ENGINE = os.environ.get("OBJ_SUMMARY_ENGINE", "abstractive")
+
+# TextRank settings
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_NEIGHBOURS = 8  # edges kept per sentence in the similarity graph
+TEXTRANK_MAX_ITER = 100
+TEXTRANK_TOL = 1e-6
+
+STOPWORDS = frozenset("""
+a about after again against all also an and any are as at be because been before being
+between both but by can could did do does doing during each few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my
+no nor not now of off on once only or other our out over own said same she should so some
+such than that the their them then there these they this those through to too under until
+up very was we were what when where which while who whom why will with would you your
+""".split())
+
+_summarizer = None
+_summarizer_lock = threading.Lock()
+_punkt_available = None
+
+def get_summarizer():
+    """Load the summarization pipeline once per process."""
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                from transformers import pipeline
+                _summarizer = pipeline("summarization", model=SUMMARIZATION_MODEL)
+    return _summarizer
+
+def punkt_available():
+    """Check for the punkt tokenizer locally; never downloads."""
+    global _punkt_available
+    if _punkt_available is None:
+        try:
+            import nltk
+            nltk.data.find('tokenizers/punkt')
+            _punkt_available = True
+        except (ImportError, LookupError):
+            print("NLTK punkt data not found, using a simple sentence splitter. "
+                  "Install it with: python -m nltk.downloader punkt")
+            _punkt_available = False
+    return _punkt_available
+
+def sent_tokenize(text):
+    if punkt_available():
+        from nltk.tokenize import sent_tokenize as nltk_sent_tokenize
+        return nltk_sent_tokenize(text)
+    return [s for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s]
+
+def _sentence_term_matrix(sentences):
+    """L2-normalised TF-IDF matrix with one row per sentence."""
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for token in re.findall(r"[a-z0-9']+", sentence.lower()):
+            if token in STOPWORDS or len(token) < 2:
+                continue
+            rows.append(i)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+
+    counts = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1.0
+    tfidf = counts * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    return tfidf / np.where(norms == 0, 1.0, norms)
+
+def _textrank(similarity):
+    """PageRank scores over a weighted sentence graph."""
+    n = similarity.shape[0]
+    np.fill_diagonal(similarity, 0.0)
+
+    # Sparsify: keep each sentence's strongest edges, then symmetrise
+    if n > TEXTRANK_NEIGHBOURS + 1:
+        cutoff = np.partition(similarity, -TEXTRANK_NEIGHBOURS, axis=1)[:, -TEXTRANK_NEIGHBOURS][:, None]
+        similarity = np.where(similarity >= cutoff, similarity, 0.0)
+        similarity = np.maximum(similarity, similarity.T)
+
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    # Sentences with no edges spread their score uniformly
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums == 0, 1.0, row_sums), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(TEXTRANK_MAX_ITER):
+        updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < TEXTRANK_TOL
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def summarize_extractive(text, max_sentences=3):
+    """
+    Pick the `max_sentences` most central sentences (TF-IDF + TextRank).
+
+    Sentences are returned in their original order. Takes a few milliseconds
+    per article on one CPU core, with no model to load.
+    """
+    sentences = sent_tokenize(text)
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+
+    matrix = _sentence_term_matrix(sentences)
+    scores = _textrank(matrix @ matrix.T)
+    top = np.sort(np.argsort(-scores, kind="stable")[:max_sentences])
+    return " ".join(sentences[i] for i in top)
+
+def summarize_with_engine(text, max_sentences=3, engine=None):
+    """
+    Summarize `text`; returns (summary, engine actually used).
+
+    If the abstractive model fails, the extractive tier is used instead and
+    reported, so the record stays eligible for a later upgrade.
+    """
+    engine = engine or DEFAULT_SUMMARY_ENGINE
+    if engine == "extractive":
+        return summarize_extractive(text, max_sentences), "extractive"
+    if engine != "abstractive":
+        raise ValueError(f"Unknown summary engine: {engine}")
 
-def summarize(text, max_sentences=3):
     try:
-        # Use a small, fast model for initial version
-        summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
-        
         # Handle long articles with chunking
         chunks = [text[i:i+1000] for i in range(0, len(text), 1000)]
-        summaries = []
-        
-        for chunk in chunks:
-            summary = summarizer(chunk, max_length=150, min_length=30, do_sample=False)
-            summaries.append(summary[0]['summary_text'])
+
+        if inference_client.enabled():
+            # Shared model server batches our chunks with other callers' work
+            summaries = inference_client.summarize_texts(chunks, max_length=150, min_length=30)
+        else:
+            # Use a small, fast model for initial version
+            summarizer = get_summarizer()
+            summaries = []
+
+            for chunk in chunks:
+                summary = summarizer(chunk, max_length=150, min_length=30, do_sample=False)
+                summaries.append(summary[0]['summary_text'])
         
         full_summary = " ".join(summaries)
         
         # Extract most important sentences
         sentences = sent_tokenize(full_summary)
-        return " ".join(sentences[:max_sentences])
+        return " ".join(sentences[:max_sentences]), "abstractive"
     
     except Exception as e:
-        print(f"Summarization failed: {str(e)}")
-        # Fallback to first 3 sentences
-        return " ".join(sent_tokenize(text)[:3])
\ No newline at end of file
+        print(f"Summarization failed, falling back to extractive: {str(e)}")
+        return summarize_extractive(text, max_sentences), "extractive"
+
+def summarize(text, max_sentences=3, engine=None):
+    return summarize_with_engine(text, max_sentences, engine)[0]
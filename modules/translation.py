@@ -1,18 +1,24 @@
-from transformers import pipeline
+import threading
 from pathlib import Path
 
+from modules import inference_client
+
 MODEL_DIR = Path("models")
 MODEL_DIR.mkdir(exist_ok=True)
 
-# Translator cache
+# Translator cache; models are loaded on first use
 translators = {}
+_translators_lock = threading.Lock()
 
 def get_translator(source_lang, target_lang="en"):
     cache_key = f"{source_lang}_{target_lang}"
     
     if cache_key not in translators:
-        model_name = f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
-        translators[cache_key] = pipeline("translation", model=model_name)
+        with _translators_lock:
+            if cache_key not in translators:
+                from transformers import pipeline
+                model_name = f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
+                translators[cache_key] = pipeline("translation", model=model_name)
     
     return translators[cache_key]
 
@@ -21,10 +27,13 @@ def translate_article(article, target_lang="en"):
         return article['text']
     
     try:
-        translator = get_translator(article['language'], target_lang)
         # Split text into chunks to avoid memory issues
         text_chunks = [article['text'][i:i+400] for i in range(0, len(article['text']), 400)]
-        translated_chunks = [translator(chunk)[0]['translation_text'] for chunk in text_chunks]
+        if inference_client.enabled():
+            translated_chunks = inference_client.translate_texts(text_chunks, article['language'], target_lang)
+        else:
+            translator = get_translator(article['language'], target_lang)
+            translated_chunks = [translator(chunk)[0]['translation_text'] for chunk in text_chunks]
         return " ".join(translated_chunks)
     except Exception as e:
         print(f"⚠️ Translation failed for {article['url']}: {str(e)}")
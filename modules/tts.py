@@ -1,4 +1,3 @@
-import edge_tts
 import asyncio
 import os
 import logging
@@ -18,6 +17,8 @@ async def generate_audio_edge(text: str, output_filename: str = "broadcast_audio
     logging.info(f"Output path: {output_path}")
 
     try:
+        import edge_tts  # imported on first use to keep API start-up fast
+
         communicate = edge_tts.Communicate(text, voice="en-US-JennyNeural")
         await communicate.save(output_path)
 
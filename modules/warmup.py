@@ -0,0 +1,56 @@
+import time
+import logging
+
+import yaml
+
+from modules import inference_client
+
+logger = logging.getLogger(__name__)
+
+WARMUP_COMPONENTS = ("summarizer", "translation", "ner", "embeddings")
+
+def _feed_languages(config_path="configs/feeds.yaml"):
+    try:
+        with open(config_path, 'r') as f:
+            sources = yaml.safe_load(f).get('sources', [])
+    except (OSError, yaml.YAMLError):
+        return set()
+    return {s.get('lang', 'en') for s in sources}
+
+def warm_up(components=None, target_lang="en", local=False):
+    """
+    Load models ahead of the first request.
+
+    Returns the seconds spent per component. Unknown component names are
+    rejected with ValueError. Nothing is loaded when models are served by the
+    shared inference server, unless `local` is set (as the server itself does).
+    """
+    components = list(components or WARMUP_COMPONENTS)
+    unknown = set(components) - set(WARMUP_COMPONENTS)
+    if unknown:
+        raise ValueError(f"Unknown warm-up components: {', '.join(sorted(unknown))}")
+
+    if not local and inference_client.enabled():
+        logger.info("Models are served by the inference server, skipping local warm-up")
+        return {}
+
+    timings = {}
+    for component in components:
+        start = time.perf_counter()
+        if component == "summarizer":
+            from modules.summarization import get_summarizer, punkt_available
+            get_summarizer()
+            punkt_available()
+        elif component == "translation":
+            from modules.translation import get_translator
+            for lang in sorted(_feed_languages() - {target_lang}):
+                get_translator(lang, target_lang)
+        elif component == "ner":
+            from nlp.entity_extractor import get_nlp
+            get_nlp()
+        elif component == "embeddings":
+            from modules.embeddings import get_embedder
+            get_embedder()
+        timings[component] = round(time.perf_counter() - start, 3)
+        logger.info(f"Warmed up {component} in {timings[component]:.2f} seconds")
+    return timings
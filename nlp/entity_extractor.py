@@ -1,10 +1,15 @@
 # obj01/nlp/entity_extractor.py
 
-import spacy
+import threading
 import networkx as nx
 from typing import List, Dict, Tuple, Set
 
-nlp = spacy.load("en_core_web_sm")
+from modules import inference_client
+
+SPACY_MODEL = "en_core_web_sm"
+
+_nlp = None
+_nlp_lock = threading.Lock()
 
 
 ENTITY_LABELS = {
@@ -14,6 +19,58 @@ ENTITY_LABELS = {
 }
 
 
+def get_nlp():
+    """
+    Load the spaCy pipeline on first use.
+
+    Returns:
+        spacy.Language: The shared English pipeline.
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL)
+    return _nlp
+
+
+def analyze_texts_locally(texts: List[str]) -> List[Dict[str, List]]:
+    """
+    Run spaCy over a batch of texts in this process.
+
+    Args:
+        texts (List[str]): Input texts.
+
+    Returns:
+        List[Dict[str, List]]: Per text, 'ents' as [text, label] pairs and
+        'sents' as one such list per sentence.
+    """
+    results = []
+    for doc in get_nlp().pipe(texts):
+        results.append({
+            "ents": [[ent.text, ent.label_] for ent in doc.ents],
+            "sents": [[[ent.text, ent.label_] for ent in sent.ents] for sent in doc.sents],
+        })
+    return results
+
+
+def analyze_texts(texts: List[str]) -> List[Dict[str, List]]:
+    """
+    Entity analysis for a batch of texts, on the shared inference server when
+    one is configured and in-process otherwise.
+
+    Args:
+        texts (List[str]): Input texts.
+
+    Returns:
+        List[Dict[str, List]]: See analyze_texts_locally.
+    """
+    if inference_client.enabled():
+        return inference_client.analyze_entities(texts)
+    return analyze_texts_locally(texts)
+
+
 def extract_named_entities(text: str) -> Dict[str, List[str]]:
     """
     Extract named entities from text grouped by category.
@@ -24,13 +81,13 @@ def extract_named_entities(text: str) -> Dict[str, List[str]]:
     Returns:
         Dict[str, List[str]]: Dictionary with keys 'people', 'organizations', 'locations'.
     """
-    doc = nlp(text)
+    analysis = analyze_texts([text])[0]
     entities = {key: [] for key in ENTITY_LABELS}
 
-    for ent in doc.ents:
+    for ent_text, ent_label in analysis["ents"]:
         for category, labels in ENTITY_LABELS.items():
-            if ent.label_ in labels:
-                entities[category].append(ent.text)
+            if ent_label in labels:
+                entities[category].append(ent_text)
 
     return {k: _deduplicate(v) for k, v in entities.items()}
 
@@ -46,22 +103,22 @@ def extract_entity_relationships(text: str, scope: str = "sentence") -> List[Tup
     Returns:
         List[Tuple[str, str, str]]: List of triples (entity1, "co_occurs_with", entity2).
     """
-    doc = nlp(text)
     relations: Set[Tuple[str, str, str]] = set()
 
     if scope == "sentence":
-        segments = list(doc.sents)
+        segments = analyze_texts([text])[0]["sents"]
     elif scope == "paragraph":
-        segments = [nlp(p) for p in text.split("\n\n")]
+        segments = [analysis["ents"] for analysis in analyze_texts(text.split("\n\n"))]
     else:
         raise ValueError("Unsupported scope. Use 'sentence' or 'paragraph'.")
 
+    tracked_labels = (ENTITY_LABELS["people"] |
+                      ENTITY_LABELS["organizations"] |
+                      ENTITY_LABELS["locations"])
     for segment in segments:
         entities = _deduplicate([
-            ent.text for ent in segment.ents
-            if ent.label_ in ENTITY_LABELS["people"] |
-                              ENTITY_LABELS["organizations"] |
-                              ENTITY_LABELS["locations"]
+            ent_text for ent_text, ent_label in segment
+            if ent_label in tracked_labels
         ])
         for i in range(len(entities)):
             for j in range(i + 1, len(entities)):
@@ -3,60 +3,218 @@ import feedparser_patch  # Add this at the very top
 
 from modules.scraping import fetch_articles
 from modules.translation import translate_article
-from modules.summarization import summarize
-from create_db import create_database, run_after_pipeline
-import json
-import os
+from modules.summarization import DEFAULT_SUMMARY_ENGINE, SUMMARY_ENGINES, summarize_with_engine
+from modules.digest_store import append_records, article_id, digest_path, read_digest
+from modules.dedup import StoryClusterIndex, cluster_articles
+from modules.embeddings import index_records
+from modules.file_lock import writer_lock
+from nlp.entity_extractor import extract_named_entities
+from create_db import create_database, run_after_pipeline, replace_summaries
+import argparse
+import uuid
 from datetime import datetime
 
-def run_pipeline():
-    print("🚀 Starting news pipeline...")
-    
+def build_record(article):
+    """Digest record for a processed article."""
+    return {
+        'id': article_id(article['url']),
+        'title': article['title'],
+        'source': article['source'],
+        'summary': article['summary'],
+        'summary_engine': article.get('summary_engine'),
+        'url': article['url'],
+        'published': article['published'],
+        'language': article.get('language'),
+        'region': article.get('region'),
+        'perspective': article.get('perspective'),
+        'diversity_score': article.get('diversity_score'),
+        'text': article.get('text'),
+        'translated_text': article.get('translated_text'),
+        'entities': article.get('entities')
+    }
+
+def new_run_id():
+    """Unique, time-ordered id of a pipeline run (local time plus a random suffix)."""
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+def resolve_summary_engine(article, summary_engine=None):
+    """Engine for an article: the run's choice, else the source's, else the default."""
+    return summary_engine or article.get('summarizer') or DEFAULT_SUMMARY_ENGINE
+
+def process_article(article, summary_engine=None):
+    """Translate and summarize one scraped article into a digest record."""
+    # Translate if needed
+    article['translated_text'] = translate_article(article)
+
+    # Summarize, recording the engine that actually produced the summary
+    article['summary'], article['summary_engine'] = summarize_with_engine(
+        article['translated_text'], engine=resolve_summary_engine(article, summary_engine))
+
+    return build_record(article)
+
+def extract_entities(summary):
+    """Named entities of a summary, or None if NER is unavailable."""
+    try:
+        return extract_named_entities(summary)
+    except Exception as e:
+        print(f"⚠️ Entity extraction failed: {str(e)}")
+        return None
+
+def process_cluster(cluster_id, members, index, summary_engine=None):
+    """
+    Run the model stages once for a story cluster.
+
+    The representative (first member) is translated and summarized unless an
+    earlier run already produced a summary for the cluster with the same or a
+    more expensive engine; every member gets that summary plus links to the
+    other sources carrying the story.
+    """
+    representative = members[0]
+    engine = resolve_summary_engine(representative, summary_engine)
+    summary = index.summary(cluster_id, engine)
+    if summary is None:
+        print(f"🔍 Processing: {representative['title']}")
+        process_article(representative, engine)
+        summary, engine = representative['summary'], representative['summary_engine']
+        index.set_summary(cluster_id, summary, engine)
+    else:
+        print(f"♻️ Reusing summary of story cluster {cluster_id} for: {representative['title']}")
+        engine = index.clusters[cluster_id].get('summary_engine') or engine
+
+    # Members share the summary, so entities are extracted once per story
+    entities = extract_entities(summary)
+
+    records = []
+    for article in members:
+        article['summary'] = summary
+        article['summary_engine'] = engine
+        article['entities'] = entities
+        record = build_record(article)
+        record['cluster_id'] = cluster_id
+        record['related'] = index.related(cluster_id, article['url'])
+        records.append(record)
+    return records
+
+def upgrade_summaries(date=None, cluster_ids=None, limit=None):
+    """
+    Replace extractive summaries with abstractive ones.
+
+    Lets a run summarize everything cheaply first and upgrade later, either
+    all extractive stories of a day or only the given clusters. Upgraded
+    records are appended to the digest (superseding the old ones) and the
+    summaries in the database are replaced.
+    """
+    stories = {}
+    for record in read_digest(date):
+        if record.get('summary_engine') != 'extractive':
+            continue
+        key = record.get('cluster_id') or record['url']
+        if cluster_ids and key not in cluster_ids:
+            continue
+        stories.setdefault(key, []).append(record)
+    selected = list(stories.items())[:limit] if limit else list(stories.items())
+
+    print(f"⬆️ Upgrading {len(selected)} stories to abstractive summaries...")
+    upgraded = []
+    replacements = {}
+    cluster_summaries = {}
+    for key, members in selected:
+        source = next((r for r in members if r.get('translated_text')), None)
+        if source is not None:
+            text = source['translated_text']
+        else:
+            text = translate_article(dict(members[0], language=members[0].get('language') or 'en'))
+        if not text:
+            continue
+
+        summary, engine = summarize_with_engine(text, engine='abstractive')
+        if engine != 'abstractive':
+            # Model unavailable; keep the extractive records so a later upgrade retries them
+            continue
+        entities = extract_entities(summary)
+        cluster_summaries[key] = summary
+        for record in members:
+            replacements[record['summary']] = summary
+            upgraded.append(dict(record, summary=summary, summary_engine='abstractive',
+                                 entities=entities))
+
+    # Only the index update needs the writer lock; the models ran unlocked
+    with writer_lock():
+        index = StoryClusterIndex()
+        for key, summary in cluster_summaries.items():
+            if key in index.clusters:
+                index.set_summary(key, summary, 'abstractive')
+        index.save()
+    append_records(upgraded, date)
+    replace_summaries(replacements)
+    print(f"✅ Upgraded {len(upgraded)} articles")
+    return upgraded
+
+def run_pipeline(summary_engine=None):
+    run_id = new_run_id()
+    print(f"🚀 Starting news pipeline (run {run_id})...")
+    if summary_engine is not None and summary_engine not in SUMMARY_ENGINES:
+        raise ValueError(f"Unknown summary engine: {summary_engine}")
+
     # Step 1: Scrape
     print("📰 Scraping articles...")
     articles = fetch_articles(max_articles=1) # Increase max_articles to fetch more stories
-    
-    # Step 2: Process each article
+
+    # Step 2: Group near-duplicate copies of the same story. The cluster
+    # index is shared with other runs, so it is only held under the writer
+    # lock while it is loaded, assigned and saved.
+    with writer_lock():
+        index = StoryClusterIndex()
+        clusters = cluster_articles(articles, index)
+        index.save()
+    print(f"🧩 {len(articles)} articles form {len(clusters)} distinct stories")
+
+    # Step 3: Process each story once, appending to today's digest as we go
+    # (the models run unlocked; append_records takes the lock per append)
+    output_file = digest_path()
     results = []
-    for article in articles:
-        print(f"🔍 Processing: {article['title']}")
-        
-        # Translate if needed
-        article['translated_text'] = translate_article(article)
-        
-        # Summarize
-        article['summary'] = summarize(article['translated_text'])
-        
-        results.append({
-            'title': article['title'],
-            'source': article['source'],
-            'summary': article['summary'],
-            'url': article['url'],
-            'published': article['published']
-        })
-    
-    # Step 3: Output
-    timestamp = datetime.now().strftime("%Y-%m-%d")
-    output_file = f"output/news_digest_{timestamp}.json"
-    
-    # Ensure output directory exists
-    os.makedirs("output", exist_ok=True)
-    
-    print("📝 Final results before saving:") # Add logging
-    print(json.dumps(results, indent=2)) # Print the results
-
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
-    
+    for cluster_id, members in clusters:
+        records = process_cluster(cluster_id, members, index, summary_engine)
+        append_records(records)
+        results.extend(records)
+
+    # Re-load the index to keep changes other runs saved meanwhile, then add ours
+    with writer_lock():
+        latest = StoryClusterIndex()
+        latest.merge(index, [cluster_id for cluster_id, _ in clusters])
+        latest.save()
+
     print(f"✅ Pipeline complete! Output saved to {output_file}")
     print(f"📊 Processed {len(results)} articles")
-    
-    # Step 4: Create/update database
+
+    # Step 4: Embed new articles for related-story and semantic search
+    try:
+        added = index_records(results)
+        print(f"🧭 Indexed {added} article embeddings")
+    except Exception as e:
+        print(f"⚠️ Embedding failed, search index not updated: {str(e)}")
+
+    # Step 5: Create/update database
     print("🗄️ Creating database tables if needed...")
     create_database()
-    
-    # Step 5: Update database with new articles
-    run_after_pipeline()
+
+    # Step 6: Update database with the new articles
+    run_after_pipeline(results, run_id)
+
+    return results
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Run the news pipeline")
+    parser.add_argument("--summary-engine", choices=SUMMARY_ENGINES,
+                        help="summarize every article with this engine (default: per source)")
+    parser.add_argument("--upgrade", action="store_true",
+                        help="upgrade extractive summaries to abstractive instead of running the pipeline")
+    parser.add_argument("--date", help="digest date for --upgrade (YYYY-MM-DD, default today)")
+    parser.add_argument("--clusters", nargs="*", help="only upgrade these story clusters")
+    parser.add_argument("--limit", type=int, help="upgrade at most this many stories")
+    args = parser.parse_args()
+
+    if args.upgrade:
+        upgrade_summaries(args.date, args.clusters, args.limit)
+    else:
+        run_pipeline(args.summary_engine)
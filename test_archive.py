@@ -0,0 +1,102 @@
+# test_archive.py
+
+import os
+
+import pytest
+
+from modules import archive
+from modules.digest_store import append_records, digest_date, digest_path, read_digest
+
+DAY = "2025-06-01"
+NEXT_DAY = "2025-06-02"
+
+
+def make_record(n, source="Source A", **fields):
+    record = {
+        "id": f"id-{n}",
+        "url": f"http://example.com/{n}",
+        "title": f"Story {n}",
+        "source": source,
+        "published": f"2025-06-01T0{n}:00:00",
+        "summary": f"Summary {n}.",
+        "summary_engine": "extractive",
+        "entities": {"PERSON": ["Ada"], "GPE": ["Paris"]},
+        "related": [{"source": "Source B", "url": "http://example.org/x", "title": "Elsewhere"}],
+        "text": f"Text {n}.",
+    }
+    record.update(fields)
+    return record
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    # The writer lock file lives under ./output
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path / "output")
+
+
+def archive_dir_of(output_dir):
+    # Where digest_store.read_digest looks for pruned days
+    return os.path.join(output_dir, "archive")
+
+
+def test_compact_prune_read_digest_round_trip(output_dir):
+    with_entities = make_record(1)
+    without_entities = make_record(2, entities=None)
+    without_related = make_record(3)
+    del without_related["related"]
+    append_records([with_entities, without_entities, without_related], DAY, output_dir)
+
+    written = archive.compact([DAY], output_dir, archive_dir_of(output_dir), prune=True)
+
+    assert written == {DAY: 3}
+    assert not os.path.exists(digest_path(DAY, output_dir))
+    records = {r["id"]: r for r in read_digest(DAY, output_dir)}
+    assert set(records) == {"id-1", "id-2", "id-3"}
+    assert records["id-1"]["entities"] == with_entities["entities"]
+    assert records["id-1"]["related"] == with_entities["related"]
+    assert records["id-1"]["summary"] == "Summary 1."
+    assert records["id-2"]["entities"] is None
+    assert records["id-3"]["related"] == []
+
+
+def test_compact_skips_unchanged_days_and_rewrites_changed_ones(output_dir):
+    archive_dir = archive_dir_of(output_dir)
+    append_records([make_record(1)], DAY, output_dir)
+
+    assert archive.compact_date(DAY, output_dir, archive_dir) == 1
+    assert archive.compact_date(DAY, output_dir, archive_dir) is None
+
+    append_records([make_record(2)], DAY, output_dir)
+    assert archive.compact_date(DAY, output_dir, archive_dir) == 2
+    assert archive.stats(archive_dir)[DAY][0] == 2
+
+
+def test_compact_refuses_to_prune_today(output_dir):
+    today = digest_date()
+    append_records([make_record(1)], today, output_dir)
+
+    with pytest.raises(ValueError):
+        archive.compact([today], output_dir, archive_dir_of(output_dir), prune=True)
+    assert os.path.exists(digest_path(today, output_dir))
+
+
+def test_scan_projects_columns_and_filters_dates_and_sources(output_dir):
+    archive_dir = archive_dir_of(output_dir)
+    append_records([make_record(1), make_record(2, source="Source B")], DAY, output_dir)
+    append_records([make_record(3), make_record(4, source="Source B")], NEXT_DAY, output_dir)
+    archive.compact([DAY, NEXT_DAY], output_dir, archive_dir)
+
+    table = archive.scan(columns=["url", "source"], start=NEXT_DAY, end=NEXT_DAY,
+                         sources=["Source B"], archive_dir=archive_dir)
+
+    assert table.column_names == ["url", "source"]
+    assert table.to_pylist() == [{"url": "http://example.com/4", "source": "Source B"}]
+    assert archive.scan(columns=["url"], start=DAY, end=NEXT_DAY, archive_dir=archive_dir).num_rows == 4
+
+
+def test_scan_of_missing_archive_is_empty(tmp_path):
+    table = archive.scan(columns=["url", "title"], archive_dir=str(tmp_path / "missing"))
+
+    assert table.num_rows == 0
+    assert table.column_names == ["url", "title"]
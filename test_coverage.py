@@ -0,0 +1,49 @@
+# test_coverage.py
+
+import os
+import tempfile
+from datetime import datetime
+
+# Must be set before api.database is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.sqlite3')}"
+
+import api.coverage
+import modules.digest_store
+from api.database import SessionLocal
+from create_db import create_database, ingest_records
+
+
+class LocalTimeAheadOfUTC(datetime):
+    """Clock of a host at UTC+2, shortly after local midnight."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 6, 2, 1, 30)
+
+    @classmethod
+    def utcnow(cls):
+        return cls(2025, 6, 1, 23, 30)
+
+
+def test_default_day_is_the_utc_day(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_database()
+    ingest_records([{
+        "id": "coverage-utc-day",
+        "url": "http://example.com/coverage-utc-day",
+        "source": "Source A",
+        "summary": "A story published late on the UTC day.",
+        "published": "2025-06-01T22:00:00+00:00",
+        "entities": None,
+    }], "run-utc-day")
+    monkeypatch.setattr(modules.digest_store, "datetime", LocalTimeAheadOfUTC)
+    monkeypatch.setattr(api.coverage, "datetime", LocalTimeAheadOfUTC)
+
+    db = SessionLocal()
+    try:
+        coverage = api.coverage.get_coverage(date=None, run_id=None, clusters=0, db=db)
+    finally:
+        db.close()
+
+    assert coverage["key"] == "2025-06-01"
+    assert coverage["articles"] == 1
@@ -0,0 +1,108 @@
+# test_worker.py
+
+import os
+import shutil
+import tempfile
+import zlib
+
+# Must be set before api.database is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.sqlite3')}"
+
+import numpy as np
+import pytest
+
+import modules.embeddings
+import worker
+from benchmarks.replay_benchmark import CORPUS_DIR, ReplayHandler, start_server
+from create_db import create_database
+from modules.dedup import StoryClusterIndex
+from modules.digest_store import read_digest
+from modules.embeddings import VectorStore
+from modules.job_queue import SQLiteJobQueue
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+  <channel>
+    <title>{name}</title>
+    <link>{{{{BASE_URL}}}}/</link>
+    <description>Test feed</description>
+    <item>
+      <title>Counting under way after tight presidential run-off</title>
+      <link>{{{{BASE_URL}}}}/html/{page}</link>
+      <guid>{{{{BASE_URL}}}}/html/{page}</guid>
+      <pubDate>Tue, 03 Jun 2025 01:30:00 GMT</pubDate>
+    </item>
+  </channel>
+</rss>
+"""
+
+
+def fake_embed_texts(texts):
+    # Deterministic unit vectors; the real model is not needed to test the plumbing
+    vectors = np.stack([np.random.RandomState(zlib.crc32(t.encode("utf-8"))).randn(16) for t in texts])
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """Work directory with a feeds config whose sources all carry the same story."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(modules.embeddings, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(worker, "SHARE_WAIT_SECONDS", 0)
+    create_database()
+
+    corpus = tmp_path / "corpus"
+    (corpus / "rss").mkdir(parents=True)
+    (corpus / "html").mkdir()
+    server = start_server(str(corpus))
+
+    def write_feeds(*names):
+        sources = []
+        for i, name in enumerate(names):
+            page = f"story-{i}.html"
+            shutil.copy(os.path.join(CORPUS_DIR, "html", "election-results.html"), corpus / "html" / page)
+            (corpus / "rss" / f"feed-{i}.xml").write_text(FEED.format(name=name, page=page))
+            sources.append(f'  - name: "{name}"\n    type: "rss"\n'
+                           f'    url: "{ReplayHandler.base_url}/rss/feed-{i}.xml"\n    lang: "en"\n')
+        config = tmp_path / "feeds.yaml"
+        config.write_text("sources:\n" + "".join(sources))
+        return str(config)
+
+    yield write_feeds
+    server.shutdown()
+
+
+def drain(queue):
+    while True:
+        job = queue.lease("test-worker")
+        if job is None:
+            return
+        assert worker.run_job(queue, job), job
+
+
+def test_article_runs_end_to_end_with_cluster_and_vector(replay):
+    queue = SQLiteJobQueue(os.path.join("output", "jobs.db"))
+    worker.enqueue_run(queue, 1, "extractive", replay("Desk A"))
+    drain(queue)
+
+    [record] = read_digest()
+    assert record["summary"] and record["summary_engine"] == "extractive"
+    assert record["cluster_id"] in StoryClusterIndex().clusters
+    assert record["related"] == []
+    assert VectorStore().get(record["id"]) is not None
+    assert queue.counts()["ingest"] == {"done": 1}
+
+
+def test_copies_of_a_story_share_one_summary(replay):
+    queue = SQLiteJobQueue(os.path.join("output", "jobs.db"))
+    worker.enqueue_run(queue, 1, "extractive", replay("Desk A", "Desk B"))
+    drain(queue)
+
+    first, copy = sorted(read_digest(), key=lambda r: r["source"])
+    assert first["cluster_id"] == copy["cluster_id"]
+    assert copy["summary"] == first["summary"]
+    assert [link["url"] for link in copy["related"]] == [first["url"]]
+    counts = queue.counts()
+    assert counts["summarize"] == {"done": 1}
+    assert counts["share"] == {"done": 1}
+    assert all(VectorStore().get(r["id"]) is not None for r in (first, copy))
@@ -0,0 +1,347 @@
+"""
+Queue worker for the news pipeline.
+
+Instead of one process running the whole pipeline, a run is split into
+article-level jobs in a durable queue (modules/job_queue.py):
+
+    fetch_source -> fetch_article -> translate -> summarize -> ingest
+                    fetch_article -> share -> ingest        (further copies of a story)
+
+Any number of workers, on this or other machines sharing the queue, lease and
+process them. A crashed worker's job is picked up again once its lease
+expires, so a run resumes instead of starting over.
+
+Articles are grouped into story clusters as they are fetched, as in
+pipeline.run_pipeline: only the first copy of a story is translated and
+summarized, the others share its summary.
+
+    python worker.py enqueue --max-articles 3     # queue a run
+    python worker.py run                          # process jobs until stopped
+    python worker.py run --stages translate summarize --drain
+    python worker.py status
+"""
+# Apply feedparser patch BEFORE importing anything else
+import feedparser_patch
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+
+from modules.job_queue import (
+    VISIBILITY_TIMEOUT_SECONDS,
+    PermanentJobError,
+    open_queue,
+)
+from modules.scraping import (
+    build_article,
+    build_page,
+    download_article_html,
+    fetch_feed_entries,
+    load_feeds,
+)
+from modules.extraction import extract_html
+from modules.source_health import (
+    Deadline,
+    RetryBudget,
+    SourceHealthTracker,
+    SOURCE_DEADLINE_SECONDS,
+)
+from modules.summarization import SUMMARY_ENGINES, summarize_with_engine
+from modules.translation import translate_article
+from modules.digest_store import append_records
+from modules.dedup import StoryClusterIndex
+from modules.embeddings import index_records
+from modules.file_lock import writer_lock
+from pipeline import build_record, extract_entities, new_run_id, resolve_summary_engine
+from create_db import create_database, ingest_records
+
+POLL_INTERVAL_SECONDS = 2.0
+
+# How long a copy of a story waits for the first copy's summary before it is
+# summarized on its own (e.g. because the first copy's job died)
+SHARE_WAIT_SECONDS = 60
+
+# Later stages are leased first, so runs finish before new ones fan out
+STAGES = ("fetch_source", "fetch_article", "translate", "summarize", "share", "ingest")
+PRIORITY = {stage: i for i, stage in enumerate(STAGES)}
+
+
+def next_job(stage, payload, key, delay=0):
+    """Follow-up job, deduplicated by run, stage and `key` so re-delivery cannot fork a run."""
+    return {
+        'stage': stage,
+        'payload': payload,
+        'dedup_key': f"{payload['run_id']}:{stage}:{key}",
+        'priority': PRIORITY[stage],
+        'delay': delay,
+    }
+
+
+def record_source_health(name, duration, error=None):
+    # Load, update and save as one step so concurrent workers do not lose updates
+    with writer_lock():
+        tracker = SourceHealthTracker()
+        if error is None:
+            tracker.record_success(name, duration)
+        else:
+            tracker.record_failure(name, error, duration)
+        tracker.save()
+
+
+def handle_fetch_source(payload):
+    source = payload['source']
+    tracker = SourceHealthTracker()
+    if tracker.is_open(source['name']):
+        print(f"⏭️ Skipping {source['name']}: circuit open after repeated failures")
+        return []
+
+    start_time = time.time()
+    deadline = Deadline(source.get('deadline', SOURCE_DEADLINE_SECONDS))
+    try:
+        entries = fetch_feed_entries(source, payload['max_articles'], RetryBudget(), deadline)
+    except Exception as e:
+        record_source_health(source['name'], time.time() - start_time, e)
+        raise
+    record_source_health(source['name'], time.time() - start_time)
+
+    return [next_job('fetch_article', dict(payload, entry=entry), entry['url']) for entry in entries]
+
+
+def handle_fetch_article(payload):
+    source, entry = payload['source'], payload['entry']
+    deadline = Deadline(source.get('deadline', SOURCE_DEADLINE_SECONDS))
+    html = download_article_html(entry['url'], RetryBudget(), deadline)
+
+    page = build_page(source, entry, html)
+    result = extract_html({'url': page['url'], 'html': html, 'extractor': page['extractor']})
+    if result['error'] or not result['text']:
+        # The same HTML will fail the same way
+        raise PermanentJobError(f"extraction failed: {result['error'] or 'no text found'}")
+
+    article = build_article(page, result)
+    article['summary_engine'] = resolve_summary_engine(article, payload.get('summary_engine'))
+
+    # The cluster index is shared with other workers and runs; assign under the lock
+    with writer_lock():
+        index = StoryClusterIndex()
+        article['cluster_id'], _ = index.assign(article)
+        index.save()
+    cluster = index.clusters[article['cluster_id']]
+
+    next_payload = _article_payload(payload, article)
+    if index.summary(article['cluster_id'], article['summary_engine']) is not None:
+        return [next_job('share', next_payload, article['url'])]
+    if cluster['representative'] == article['url'] or cluster.get('summary') is not None:
+        # First copy of the story, or its stored summary came from a cheaper engine
+        return [next_job('translate', next_payload, article['url'])]
+    # Another copy is being summarized right now; give it time to finish
+    return [next_job('share', next_payload, article['url'], delay=SHARE_WAIT_SECONDS)]
+
+
+def handle_translate(payload):
+    article = payload['article']
+    article['translated_text'] = translate_article(article)
+    return [next_job('summarize', payload, article['url'])]
+
+
+def handle_summarize(payload):
+    article = payload['article']
+    article['summary'], article['summary_engine'] = summarize_with_engine(
+        article['translated_text'], engine=resolve_summary_engine(article, payload.get('summary_engine')))
+    article['entities'] = extract_entities(article['summary'])
+
+    cluster_id = article.get('cluster_id')
+    with writer_lock():
+        index = StoryClusterIndex()
+        # Keep a summary another worker stored meanwhile if it came from a better engine
+        if cluster_id in index.clusters and index.summary(cluster_id, article['summary_engine']) is None:
+            index.set_summary(cluster_id, article['summary'], article['summary_engine'])
+            index.save()
+    return [next_job('ingest', {'run_id': payload['run_id'], 'record': cluster_record(article, index)},
+                     article['url'])]
+
+
+def handle_share(payload):
+    article = payload['article']
+    cluster_id = article['cluster_id']
+    index = StoryClusterIndex()
+    summary = index.summary(cluster_id, article['summary_engine']) if cluster_id in index.clusters else None
+    if summary is None:
+        print(f"⏳ Story cluster {cluster_id} has no summary yet, summarizing {article['url']} itself")
+        return [next_job('translate', payload, article['url'])]
+
+    print(f"♻️ Reusing summary of story cluster {cluster_id} for: {article['title']}")
+    article['summary'] = summary
+    article['summary_engine'] = index.clusters[cluster_id].get('summary_engine') or article['summary_engine']
+    article['entities'] = extract_entities(summary)
+    return [next_job('ingest', {'run_id': payload['run_id'], 'record': cluster_record(article, index)},
+                     article['url'])]
+
+
+def cluster_record(article, index):
+    """Digest record of an article with its story cluster and cross-source links."""
+    record = build_record(article)
+    cluster_id = article.get('cluster_id')
+    if cluster_id is not None:
+        record['cluster_id'] = cluster_id
+        record['related'] = index.related(cluster_id, article['url']) if cluster_id in index.clusters else []
+    return record
+
+
+def handle_ingest(payload):
+    # Every step is idempotent: the digest keeps the last record per URL, the
+    # database skips summaries and aggregates it already has and the vector
+    # store skips ids it already holds
+    append_records([payload['record']])
+    if not ingest_records([payload['record']], payload['run_id']):
+        raise RuntimeError("database update failed")
+    index_records([payload['record']])
+    return []
+
+
+def _article_payload(payload, article):
+    return {'run_id': payload['run_id'], 'summary_engine': payload.get('summary_engine'), 'article': article}
+
+
+HANDLERS = {
+    'fetch_source': handle_fetch_source,
+    'fetch_article': handle_fetch_article,
+    'translate': handle_translate,
+    'summarize': handle_summarize,
+    'share': handle_share,
+    'ingest': handle_ingest,
+}
+
+
+def enqueue_run(queue, max_articles=1, summary_engine=None, config_path="configs/feeds.yaml"):
+    """Queue a fetch_source job per configured source; returns the run id."""
+    if summary_engine is not None and summary_engine not in SUMMARY_ENGINES:
+        raise ValueError(f"Unknown summary engine: {summary_engine}")
+    run_id = new_run_id()
+    sources = load_feeds(config_path)
+    queued = 0
+    for source in sources:
+        payload = {'run_id': run_id, 'source': source, 'max_articles': max_articles,
+                   'summary_engine': summary_engine}
+        if queue.enqueue(**next_job('fetch_source', payload, source['name'])) is not None:
+            queued += 1
+    if queued < len(sources):
+        print(f"⚠️ {len(sources) - queued} of {len(sources)} sources of run {run_id} were already queued")
+    print(f"📥 Queued run {run_id}: {queued} sources, up to {max_articles} articles each")
+    return run_id
+
+
+def run_job(queue, job, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS):
+    """Process one leased job, keeping its lease alive while the handler runs."""
+    done = threading.Event()
+
+    def heartbeat():
+        while not done.wait(visibility_timeout / 3):
+            if not queue.extend(job, visibility_timeout):
+                print(f"⚠️ Lost the lease on {job}")
+                return
+
+    handler = HANDLERS.get(job.stage)
+    if handler is None:
+        queue.fail(job, f"unknown stage {job.stage!r}", permanent=True)
+        print(f"❌ {job} has an unknown stage")
+        return False
+
+    threading.Thread(target=heartbeat, name=f"lease-{job.id}", daemon=True).start()
+    try:
+        next_jobs = handler(job.payload)
+    except Exception as e:
+        status = queue.fail(job, e, permanent=isinstance(e, PermanentJobError))
+        print(f"❌ {job} failed ({status or 'lease lost'}): {str(e)}")
+        return False
+    finally:
+        done.set()
+
+    if not queue.complete(job, next_jobs):
+        print(f"⚠️ Lease on {job} expired before it finished; another worker owns it now")
+        return False
+    return True
+
+
+def run_worker(queue, stages=None, worker_id=None, drain=False,
+               poll_interval=POLL_INTERVAL_SECONDS, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS):
+    """
+    Lease and process jobs until SIGINT/SIGTERM, or with `drain` until no job
+    is available. The current job is always finished before exiting.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    stop = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+    if stages is None or 'ingest' in stages:
+        create_database()
+
+    print(f"👷 Worker {worker_id} started ({', '.join(stages or STAGES)})")
+    processed = 0
+    while not stop.is_set():
+        job = queue.lease(worker_id, stages, visibility_timeout)
+        if job is None:
+            if drain:
+                break
+            stop.wait(poll_interval)
+            continue
+        print(f"🔧 {job}")
+        run_job(queue, job, visibility_timeout)
+        processed += 1
+    print(f"👋 Worker {worker_id} stopped after {processed} jobs")
+    return processed
+
+
+def print_status(queue):
+    counts = queue.counts()
+    if not counts:
+        print("Queue is empty")
+    for stage in sorted(counts, key=lambda s: PRIORITY.get(s, len(STAGES))):
+        print(f"{stage:>14}: " + ", ".join(f"{status} {count}" for status, count in sorted(counts[stage].items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue and process news pipeline jobs")
+    parser.add_argument("--queue", help="queue URL (default: $OBJ_QUEUE_URL or sqlite:///output/jobs.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = commands.add_parser("enqueue", help="queue a pipeline run")
+    enqueue_parser.add_argument("--max-articles", type=int, default=1, help="articles per source")
+    enqueue_parser.add_argument("--summary-engine", choices=SUMMARY_ENGINES,
+                                help="summarize every article with this engine (default: per source)")
+    enqueue_parser.add_argument("--config", default="configs/feeds.yaml", help="feeds config")
+
+    run_parser = commands.add_parser("run", help="process jobs")
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, help="only lease jobs of these stages")
+    run_parser.add_argument("--worker-id", help="lease owner name (default: host:pid)")
+    run_parser.add_argument("--drain", action="store_true", help="exit when no job is available")
+    run_parser.add_argument("--visibility-timeout", type=float, default=VISIBILITY_TIMEOUT_SECONDS,
+                            help="seconds before an unfinished job may be leased by another worker")
+
+    commands.add_parser("status", help="job counts per stage and state")
+
+    requeue_parser = commands.add_parser("requeue-dead", help="retry jobs that ran out of attempts")
+    requeue_parser.add_argument("--stage", choices=STAGES)
+
+    purge_parser = commands.add_parser("purge", help="delete finished jobs")
+    purge_parser.add_argument("--days", type=float, default=7, help="keep jobs finished within this many days")
+
+    args = parser.parse_args()
+    queue = open_queue(args.queue)
+
+    if args.command == "enqueue":
+        enqueue_run(queue, args.max_articles, args.summary_engine, args.config)
+    elif args.command == "run":
+        run_worker(queue, args.stages, args.worker_id, args.drain,
+                   visibility_timeout=args.visibility_timeout)
+    elif args.command == "status":
+        print_status(queue)
+    elif args.command == "requeue-dead":
+        print(f"🔁 Requeued {queue.requeue_dead(args.stage)} dead jobs")
+    elif args.command == "purge":
+        print(f"🧹 Deleted {queue.purge(args.days * 86400)} finished jobs")